@@ -1,9 +1,17 @@
 
 # import libraries
+import asyncio
+import codecs
 import google.generativeai as genai
 import os
+import re
+import threading
+import time
 import requests
-from bs4 import BeautifulSoup
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from html.parser import HTMLParser
+from requests.adapters import HTTPAdapter
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain.tools import Tool
 from langchain.agents import initialize_agent
@@ -22,34 +30,198 @@ os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
 genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
 llm = ChatGoogleGenerativeAI(model="gemini-2.0-flash")
 
-# Define a search function with content extraction
-def google_search_with_content(query, num_results=5):
-    search_results = list(search(query, num_results=num_results))  # Get search URLs
-    extracted_content = []
+# Page fetching: one pooled session, all result URLs fetched concurrently, bounded reads
+MAX_PARAGRAPHS = 10
+MAX_PAGE_BYTES = 512 * 1024  # Stop downloading a page after this many bytes
+FETCH_TIMEOUT = (3.05, 5)  # (connect, read) seconds
+FETCH_POOL_SIZE = 16
+PAGE_CACHE_SIZE = 1000
+
+def make_http_session(pool_size=FETCH_POOL_SIZE):
+    session = requests.Session()
+    session.headers["User-Agent"] = "Mozilla/5.0"  # Avoid bot detection
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http_session = make_http_session()
+
+class ParagraphParser(HTMLParser):
+    """Collects the text of the first `max_paragraphs` <p> tags, fed incrementally."""
+    SKIP_TAGS = {"script", "style", "noscript"}
+
+    def __init__(self, max_paragraphs=MAX_PARAGRAPHS):
+        super().__init__(convert_charrefs=True)
+        self.max_paragraphs = max_paragraphs
+        self.paragraphs = []
+        self._current = None
+        self._skip_depth = 0
+
+    @property
+    def done(self):
+        return len(self.paragraphs) >= self.max_paragraphs
+
+    def _close_paragraph(self):
+        if self._current is not None and not self.done:
+            self.paragraphs.append("".join(self._current))
+        self._current = None
+
+    def handle_starttag(self, tag, attrs):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth += 1
+        elif tag == "p":
+            self._close_paragraph()  # <p> implicitly closes an open <p>
+            self._current = []
+
+    def handle_endtag(self, tag):
+        if tag in self.SKIP_TAGS:
+            self._skip_depth = max(0, self._skip_depth - 1)
+        elif tag == "p":
+            self._close_paragraph()
+
+    def handle_data(self, data):
+        if self._current is not None and not self._skip_depth:
+            self._current.append(data)
+
+    def text(self):
+        """Joined paragraph text, including a paragraph cut off by the byte cap."""
+        paragraphs = list(self.paragraphs)
+        if self._current is not None and not self.done:
+            paragraphs.append("".join(self._current))
+        return " ".join(paragraphs)
+
+class PageCache:
+    """URL-keyed LRU of extracted page text with the validators needed for conditional requests."""
+    def __init__(self, max_entries=PAGE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # url -> {"content", "etag", "last_modified", "fresh_until"}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.revalidated = 0
+        self.misses = 0
 
-    for url in search_results:
+    def get(self, url):
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is not None:
+                self._entries.move_to_end(url)
+            return entry
+
+    @staticmethod
+    def _fresh_until(headers):
+        """Honors Cache-Control max-age; without it every reuse is revalidated."""
+        cache_control = headers.get("Cache-Control", "").lower()
+        max_age = re.search(r"max-age=(\d+)", cache_control)
+        if max_age and "no-cache" not in cache_control:
+            return time.time() + int(max_age.group(1))
+        return 0.0
+
+    def put(self, url, content, headers):
+        if "no-store" in headers.get("Cache-Control", "").lower():
+            return
+        entry = {"content": content, "etag": headers.get("ETag"),
+                 "last_modified": headers.get("Last-Modified"), "fresh_until": self._fresh_until(headers)}
+        with self._lock:
+            self._entries[url] = entry
+            self._entries.move_to_end(url)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, url, headers):
+        """Updates validators and freshness after a 304 Not Modified."""
+        with self._lock:
+            entry = self._entries.get(url)
+            if entry is None:
+                return
+            entry["etag"] = headers.get("ETag", entry["etag"])
+            entry["last_modified"] = headers.get("Last-Modified", entry["last_modified"])
+            entry["fresh_until"] = self._fresh_until(headers)
+
+    def count(self, field):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+
+    def stats(self):
+        return {"entries": len(self._entries), "hits": self.hits, "revalidated": self.revalidated,
+                "misses": self.misses}
+
+page_cache = PageCache()
+
+def _read_paragraphs(response, max_bytes=MAX_PAGE_BYTES, max_paragraphs=MAX_PARAGRAPHS):
+    """Feeds the body to the parser chunk by chunk; stops at the byte cap or once enough <p> tags are seen."""
+    content_type = response.headers.get("Content-Type", "").lower()
+    encoding = response.encoding if "charset" in content_type and response.encoding else "utf-8"
+    decoder = codecs.getincrementaldecoder(encoding)(errors="replace")
+    parser = ParagraphParser(max_paragraphs)
+    read = 0
+    for chunk in response.iter_content(chunk_size=16 * 1024):
+        chunk = chunk[:max_bytes - read]
+        read += len(chunk)
+        parser.feed(decoder.decode(chunk))
+        if parser.done or read >= max_bytes:
+            break
+    else:
+        parser.feed(decoder.decode(b"", final=True))
+        parser.close()
+    return parser.text()
+
+def fetch_page_content(url, cache=page_cache):
+    """Returns the first paragraphs of a page, revalidating cached copies with ETag/Last-Modified."""
+    entry = cache.get(url)
+    if entry is not None and entry["fresh_until"] > time.time():
+        cache.count("hits")
+        return entry["content"]
+
+    headers = {}
+    if entry is not None:
+        if entry["etag"]:
+            headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            headers["If-Modified-Since"] = entry["last_modified"]
+    try:
+        response = http_session.get(url, headers=headers, timeout=FETCH_TIMEOUT, stream=True)
+    except Exception as e:
+        return f"Error fetching content: {e}"
+    with response:
+        if response.status_code == 304 and entry is not None:
+            cache.count("revalidated")
+            cache.refresh(url, response.headers)
+            return entry["content"]
         try:
-            headers = {"User-Agent": "Mozilla/5.0"}  # Avoid bot detection
-            response = requests.get(url, headers=headers, timeout=5)
             response.raise_for_status()  # Check if request was successful
-            
-            soup = BeautifulSoup(response.text, "html.parser")
-            
-            # Extract text content (Modify based on website structure)
-            paragraphs = soup.find_all("p")  
-            page_content = " ".join([p.get_text() for p in paragraphs[:10]])  # Get first 10 paragraphs
-            
-            extracted_content.append({"url": url, "content": page_content})
-        
+            content = _read_paragraphs(response)
         except Exception as e:
-            extracted_content.append({"url": url, "content": f"Error fetching content: {e}"})
+            return f"Error fetching content: {e}"
+    cache.count("misses")
+    cache.put(url, content, response.headers)
+    return content
+
+async def fetch_pages(urls):
+    """Fetches all URLs concurrently over the pooled session; results are in input order."""
+    contents = await asyncio.gather(*(asyncio.to_thread(fetch_page_content, url) for url in urls))
+    return [{"url": url, "content": content} for url, content in zip(urls, contents)]
 
-    return extracted_content
+# Define a search function with content extraction
+async def agoogle_search_with_content(query, num_results=5):
+    search_results = await asyncio.to_thread(lambda: list(search(query, num_results=num_results)))  # Get search URLs
+    return await fetch_pages(search_results)
+
+def google_search_with_content(query, num_results=5):
+    """Sync entry point for the tool; safe to call from code that is already inside an event loop."""
+    try:
+        asyncio.get_running_loop()
+    except RuntimeError:
+        return asyncio.run(agoogle_search_with_content(query, num_results))
+    # asyncio.run can't nest, so run this search on its own loop in a worker thread.
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        return executor.submit(asyncio.run, agoogle_search_with_content(query, num_results)).result()
 
 # Wrap function as a LangChain Tool
 search_tool = Tool(
     name="Google Search with Content Extraction",
     func=google_search_with_content,
+    coroutine=agoogle_search_with_content,
     description="Use this tool to search Google and extract content from top results."
 )
 def main():
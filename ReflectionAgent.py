@@ -1,20 +1,123 @@
-import google.generativeai as genai
-import os
 import argparse
-# Set up Gemini API key
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+import numpy as np
+from llm_client import get_client
+from text_vectors import cosine_scores, hash_embedding
+
+MEMORY_TOKEN_BUDGET = 2000  # Total tokens kept in memory before old reflections are merged
+PROMPT_TOKEN_BUDGET = 600  # Tokens of memory pasted into one actor prompt
+MEMORY_TOP_K = 3
+MEMORY_DIM = 512
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token)."""
+    return max(1, len(text) // 4)
+
+def truncate_tokens(text, tokens):
+    return text if estimate_tokens(text) <= tokens else text[:tokens * 4].rsplit(" ", 1)[0] + " ..."
+
+class ReflectionMemory:
+    """
+    Bounded reflection store. Entries are embedded once; `select` returns the
+    top-k most relevant entries that fit in the prompt budget, and once the
+    total exceeds `token_budget` the oldest entries are merged into a summary.
+    """
+    def __init__(self, token_budget=MEMORY_TOKEN_BUDGET, prompt_token_budget=PROMPT_TOKEN_BUDGET,
+                 top_k=MEMORY_TOP_K, dim=MEMORY_DIM, summarize=None):
+        self.token_budget = token_budget
+        self.prompt_token_budget = prompt_token_budget
+        self.top_k = top_k
+        self.dim = dim
+        self.summarize = summarize  # Callable(list of texts) -> summary text; extractive if None
+        self.entries = []  # Oldest first: {"text", "tokens", "merged"}
+        self.vectors = np.zeros((0, dim), dtype="float32")
+        self.total_tokens = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return (entry["text"] for entry in self.entries)
+
+    def add(self, text, merged=1):
+        self.entries.append({"text": text, "tokens": estimate_tokens(text), "merged": merged})
+        self.vectors = np.vstack([self.vectors, hash_embedding(text, self.dim)[None, :]])
+        self.total_tokens += self.entries[-1]["tokens"]
+        if self.total_tokens > self.token_budget and len(self.entries) > 1:
+            self.compact()
+
+    def _extractive_summary(self, texts):
+        return " ".join(text.split(". ")[0].strip() for text in texts)
+
+    def compact(self):
+        """Merges the oldest entries into one summary until memory is back under half the budget."""
+        excess = self.total_tokens - self.token_budget // 2
+        count, freed = 0, 0
+        while count < len(self.entries) - 1 and (freed < excess or count < 2):
+            freed += self.entries[count]["tokens"]
+            count += 1
+        old = self.entries[:count]
+        texts = [entry["text"] for entry in old]
+        try:
+            summary = self.summarize(texts) if self.summarize else self._extractive_summary(texts)
+        except Exception:
+            summary = self._extractive_summary(texts)
+        summary = truncate_tokens(summary, self.token_budget // 4)
+
+        self.entries = self.entries[count:]
+        self.vectors = self.vectors[count:]
+        self.total_tokens -= freed
+        summary_entry = {"text": summary, "tokens": estimate_tokens(summary),
+                         "merged": sum(entry["merged"] for entry in old)}
+        self.entries.insert(0, summary_entry)
+        self.vectors = np.vstack([hash_embedding(summary, self.dim)[None, :], self.vectors])
+        self.total_tokens += summary_entry["tokens"]
+
+    def select(self, observation):
+        """
+        Returns the most relevant reflections for `observation` within the prompt budget,
+        oldest first. The best-ranked entry that doesn't fit is truncated to what is left.
+        """
+        if not self.entries:
+            return []
+        scores = cosine_scores(hash_embedding(observation, self.dim), self.vectors)
+        chosen, used = {}, 0  # entry index -> text
+        for i in np.argsort(-scores)[:self.top_k]:
+            entry = self.entries[i]
+            remaining = self.prompt_token_budget - used
+            if entry["tokens"] <= remaining:
+                chosen[int(i)] = entry["text"]
+                used += entry["tokens"]
+                continue
+            if remaining > 1:  # The " ..." marker costs about one token
+                chosen[int(i)] = truncate_tokens(entry["text"], remaining - 1)
+            break
+        return [chosen[i] for i in sorted(chosen)]
 
 class ReflexionAgent:
-    def __init__(self, model_name="gemini-2.0-flash"):
-        self.model = genai.GenerativeModel(model_name)  # Use the correct model API
-        self.memory = []  # Store past interactions for context
+    def __init__(self, model_name="gemini-2.0-flash", memory_token_budget=MEMORY_TOKEN_BUDGET,
+                 prompt_token_budget=PROMPT_TOKEN_BUDGET, top_k=MEMORY_TOP_K):
+        self.model = get_client().model(model_name)  # Shared, rate-limited Gemini model
+        # Past feedback, bounded and ranked by relevance to the current observation
+        self.memory = ReflectionMemory(memory_token_budget, prompt_token_budget, top_k,
+                                       summarize=self.summarize_reflections)
+    
+    def summarize_reflections(self, reflections):
+        """Merges old reflections into one short list of lessons learned."""
+        joined = "\n".join(f"- {reflection}" for reflection in reflections)
+        prompt = f"""
+        Merge the following feedback into a concise list of the key lessons learned, without repetition:
+        {joined}
+        """
+        response = self.model.generate_content(prompt)
+        return response.text.strip()
     
     def actor(self, observation):
         """Generates actions based on observations using Chain-of-Thought (CoT) and ReAct."""
+        relevant = "\n".join(f"- {reflection}" for reflection in self.memory.select(observation))
         prompt = f"""
         Observation: {observation}
-        Memory: {self.memory}
+        Memory:
+        {relevant or "None"}
         
         Based on the observation and past experiences, determine the best action.
         """
@@ -47,7 +150,7 @@ class ReflexionAgent:
         """
         response = self.model.generate_content(prompt)
         feedback = response.text.strip() if response.text else "No feedback generated"
-        self.memory.append(feedback)  # Store feedback in memory
+        self.memory.add(feedback)  # Store feedback in memory
         return feedback
     
     def run(self, observation):
@@ -1,7 +1,10 @@
-import google.generativeai as genai
+import os
+import sys
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
 class BookingAgent:
     def __init__(self, model_name="gemini-2.0-flash"):
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_client().model(model_name, cache_namespace="booking")
         self.memory = {}
 
     def book(self, details):
@@ -13,5 +16,6 @@ class BookingAgent:
         return booking_info
 
 # Example Usage
-booking_agent = BookingAgent()
-print(booking_agent.book("Flight from New York to London on April 10"))
+if __name__ == "__main__":
+    booking_agent = BookingAgent()
+    print(booking_agent.book("Flight from New York to London on April 10"))
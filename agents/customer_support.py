@@ -1,112 +1,248 @@
-import google.generativeai as genai
+import atexit
+import logging
 import os
+import queue
 import sqlite3
 import json
+import sys
+import threading
+import time
 
 # -------------------------------
 # Setup Gemini API
 # -------------------------------
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-if not GEMINI_API_KEY:
-    raise Exception("Please set your GOOGLE_API_KEY environment variable.")
+# The shared client configures Gemini from GOOGLE_API_KEY (or uses the fake backend when LLM_BACKEND=fake).
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
 
-genai.configure(api_key=GEMINI_API_KEY)
+logger = logging.getLogger(__name__)
+WRITE_RETRIES = 3  # Extra attempts for a group of conversation turns before it is dropped
 
 # -------------------------------
 # Long-Term Memory: SQLite for Conversation History & Training Data
 # -------------------------------
+class KnowledgeSnapshot:
+    """Immutable view of training data and offers at one version."""
+    def __init__(self, version, training, offers):
+        self.version = version
+        self.training = training  # info_type -> content
+        self.offers = offers  # offer_id -> (description, discount_percentage)
+
+    def training_data(self, info_type):
+        return self.training.get(info_type, "No data available.")
+
 class LongTermMemory:
-    def __init__(self, db_file="agent_memory.db"):
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
+    """
+    SQLite store in WAL mode with one connection per thread. Conversation turns are
+    queued to a background writer that commits them in groups; reads of a user's
+    history first wait for that user's queued turns, so callers see their own writes.
+    """
+    def __init__(self, db_file="agent_memory.db", batch_size=256, flush_interval=0.05):
+        self.db_file = db_file
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval  # Max seconds a queued turn waits for more to group with
+        self._local = threading.local()
+        self._queue = queue.Queue()
+        self._pending = {}  # user_id -> queued turns not yet committed
+        self._pending_lock = threading.Condition()
+        self._closed = False
+        self._snapshot = None
+        self._snapshot_lock = threading.Lock()
         self.setup_db()
+        self._writer = threading.Thread(target=self._write_loop, name="conversation-writer", daemon=True)
+        self._writer.start()
+        atexit.register(self.close)
+
+    @property
+    def conn(self):
+        """This thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_file, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")  # Readers don't block the writer and vice versa
+        conn.execute("PRAGMA synchronous=NORMAL")  # Safe with WAL; fsync only at checkpoints
+        return conn
 
     def setup_db(self):
         """Create necessary tables if they do not exist."""
-        self.cursor.execute("""
+        self.conn.execute("""
             CREATE TABLE IF NOT EXISTS conversation (
                 user_id TEXT,
                 query TEXT,
                 response TEXT
             )
         """)
-        self.cursor.execute("""
+        # Index entries carry the rowid, so this serves "WHERE user_id=? ORDER BY rowid DESC" directly.
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_user ON conversation(user_id)")
+        self.conn.execute("""
             CREATE TABLE IF NOT EXISTS training_data (
                 info_type TEXT PRIMARY KEY, 
                 content TEXT
             )
         """)
-        self.cursor.execute("""
+        self.conn.execute("""
             CREATE TABLE IF NOT EXISTS offers (
                 offer_id TEXT PRIMARY KEY,
                 description TEXT,
                 discount_percentage REAL
             )
         """)
+        # Bumped by triggers in the same transaction as any training data / offer change,
+        # from whichever process or connection makes it; snapshots are keyed on it.
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS knowledge_version (
+                id INTEGER PRIMARY KEY CHECK (id = 0),
+                version INTEGER NOT NULL
+            )
+        """)
+        self.conn.execute("INSERT OR IGNORE INTO knowledge_version (id, version) VALUES (0, 0)")
+        for table in ("training_data", "offers"):
+            for event in ("INSERT", "UPDATE", "DELETE"):
+                self.conn.execute(f"""
+                    CREATE TRIGGER IF NOT EXISTS {table}_{event.lower()}_version AFTER {event} ON {table}
+                    BEGIN UPDATE knowledge_version SET version = version + 1 WHERE id = 0; END
+                """)
         self.conn.commit()
 
+    # -------------------------------
+    # Background conversation writer
+    # -------------------------------
+    def _write_loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.flush_interval
+            while batch[-1] is not None and len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get(timeout=max(0.0, deadline - time.monotonic())))
+                except queue.Empty:
+                    break
+            stop = batch[-1] is None
+            rows = [row for row in batch if row is not None]
+            try:
+                if rows:
+                    self._insert(rows)
+            finally:
+                # Always release the turns, or readers waiting in flush() would hang.
+                with self._pending_lock:
+                    for user_id, _, _ in rows:
+                        self._pending[user_id] -= 1
+                        if not self._pending[user_id]:
+                            del self._pending[user_id]
+                    self._pending_lock.notify_all()
+            if stop:
+                return
+
+    def _insert(self, rows):
+        """Commits a group of turns in one transaction, retrying errors such as a locked database."""
+        for attempt in range(WRITE_RETRIES + 1):
+            try:
+                with self.conn:
+                    self.conn.executemany("INSERT INTO conversation (user_id, query, response) VALUES (?, ?, ?)",
+                                          rows)
+                return
+            except sqlite3.OperationalError as e:  # Locked, busy or I/O errors may pass
+                if attempt == WRITE_RETRIES:
+                    logger.error("Dropped %d conversation turns after %d attempts: %s", len(rows), attempt + 1, e)
+                    return
+                logger.warning("Storing %d conversation turns failed (%s); retrying", len(rows), e)
+                time.sleep(0.1 * 2 ** attempt)
+            except Exception:
+                logger.exception("Dropped %d conversation turns", len(rows))
+                return
+
+    def flush(self, user_id=None):
+        """Blocks until queued turns (of `user_id`, or everyone's) are committed."""
+        with self._pending_lock:
+            while (self._pending.get(user_id) if user_id is not None else self._pending):
+                self._pending_lock.wait()
+
+    def close(self):
+        if self._closed:
+            return
+        self._closed = True
+        self._queue.put(None)
+        self._writer.join()
+
     def store_conversation(self, user_id, query, response):
         """Store user queries and AI responses."""
-        self.cursor.execute("INSERT INTO conversation (user_id, query, response) VALUES (?, ?, ?)",
-                            (user_id, query, response))
-        self.conn.commit()
+        if self._closed:
+            raise RuntimeError("LongTermMemory is closed")
+        with self._pending_lock:
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+        self._queue.put((user_id, query, response))
 
     def get_recent_conversations(self, user_id, limit=3):
         """Retrieve recent conversation history for a user."""
-        self.cursor.execute("SELECT query, response FROM conversation WHERE user_id=? ORDER BY rowid DESC LIMIT ?",
-                            (user_id, limit))
-        return self.cursor.fetchall()
+        self.flush(user_id)
+        return self.conn.execute(
+            "SELECT query, response FROM conversation WHERE user_id=? ORDER BY rowid DESC LIMIT ?",
+            (user_id, limit)).fetchall()
+
+    # -------------------------------
+    # Training data & offers: in-process snapshot keyed on the database's knowledge version
+    # -------------------------------
+    def _knowledge_version(self):
+        return self.conn.execute("SELECT version FROM knowledge_version WHERE id = 0").fetchone()[0]
+
+    def snapshot(self):
+        """
+        Returns the current KnowledgeSnapshot. Each call costs one primary-key lookup;
+        the tables are only re-read after a write, from this or any other process.
+        """
+        version = self._knowledge_version()
+        with self._snapshot_lock:
+            if self._snapshot is not None and self._snapshot.version == version:
+                return self._snapshot
+        conn = self.conn
+        conn.execute("BEGIN")  # One read transaction, so the version matches the rows read
+        try:
+            version = self._knowledge_version()
+            training = dict(conn.execute("SELECT info_type, content FROM training_data").fetchall())
+            offers = {offer_id: (description, discount) for offer_id, description, discount in
+                      conn.execute("SELECT offer_id, description, discount_percentage FROM offers").fetchall()}
+        finally:
+            conn.commit()
+        snapshot = KnowledgeSnapshot(version, training, offers)
+        with self._snapshot_lock:
+            if self._snapshot is None or self._snapshot.version < version:  # Never go back to older data
+                self._snapshot = snapshot
+        return snapshot
 
     def add_or_update_training_data(self, info_type, content):
         """Insert new information or update existing info dynamically."""
-        self.cursor.execute("""
-            INSERT INTO training_data (info_type, content) 
-            VALUES (?, ?) 
-            ON CONFLICT(info_type) DO UPDATE SET content = excluded.content
-        """, (info_type, content))
-        self.conn.commit()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO training_data (info_type, content) 
+                VALUES (?, ?) 
+                ON CONFLICT(info_type) DO UPDATE SET content = excluded.content
+            """, (info_type, content))
 
     def get_training_data(self, info_type):
         """Retrieve updated training data from the database."""
-        self.cursor.execute("SELECT content FROM training_data WHERE info_type=?", (info_type,))
-        result = self.cursor.fetchone()
-        return result[0] if result else "No data available."
+        return self.snapshot().training_data(info_type)
 
     def add_or_update_offer(self, offer_id, description, discount_percentage):
         """Store or update available offers."""
-        self.cursor.execute("""
-            INSERT INTO offers (offer_id, description, discount_percentage)
-            VALUES (?, ?, ?)
-            ON CONFLICT(offer_id) DO UPDATE SET description = excluded.description, discount_percentage = excluded.discount_percentage
-        """, (offer_id, description, discount_percentage))
-        self.conn.commit()
+        with self.conn:
+            self.conn.execute("""
+                INSERT INTO offers (offer_id, description, discount_percentage)
+                VALUES (?, ?, ?)
+                ON CONFLICT(offer_id) DO UPDATE SET description = excluded.description, discount_percentage = excluded.discount_percentage
+            """, (offer_id, description, discount_percentage))
 
     def get_offer_discount(self, offer_id):
         """Retrieve discount percentage for a specific offer."""
-        self.cursor.execute("SELECT discount_percentage FROM offers WHERE offer_id=?", (offer_id,))
-        result = self.cursor.fetchone()
-        return result[0] if result else None
+        offer = self.snapshot().offers.get(offer_id)
+        return offer[1] if offer else None
 
 # -------------------------------
 # Customer Support Agent
 # -------------------------------
-class CustomerSupportAgent:
-    def __init__(self, model_name="gemini-2.0-flash"):
-        self.model = genai.GenerativeModel(model_name)
-        self.memory = LongTermMemory()
-
-    def plan_response(self, user_query, user_id):
-        """
-        Fetch dynamically updated training data and use it in the response generation.
-        """
-        recent_conv = self.memory.get_recent_conversations(user_id)
-        history_text = "\n".join([f"User: {q}\nAgent: {r}" for q, r in recent_conv]) if recent_conv else "None"
-
-        product_info = self.memory.get_training_data("product")
-        offers_info = self.memory.get_training_data("offer")
-        refund_info = self.memory.get_training_data("refund")
-
-        prompt = f"""
+PROMPT_PREFIX = """
 You are a customer support AI agent for ElectroShop, handling orders, products, refunds, and discounts.
 You have access to the following dynamically updated information:
 
@@ -115,9 +251,9 @@ You have access to the following dynamically updated information:
 - Refund Policy: {refund_info}
 
 Recent Conversation History:
-{history_text}
+"""
 
-User Query: {user_query}
+PROMPT_SUFFIX = """
 
 Follow these steps:
 1. Identify if the query is about a product, offer, refund, discount, or general support.
@@ -127,6 +263,34 @@ Follow these steps:
 
 Provide a concise plan in green followed by the final answer in yellow.
         """
+
+class CustomerSupportAgent:
+    def __init__(self, model_name="gemini-2.0-flash", db_file="agent_memory.db"):
+        self.model = get_client().model(model_name)
+        self.memory = LongTermMemory(db_file)
+        self._prefix = (None, "")  # (snapshot version, rendered PROMPT_PREFIX)
+
+    def prompt_prefix(self):
+        """The static part of the prompt, re-rendered only when training data or offers change."""
+        snapshot = self.memory.snapshot()
+        version, prefix = self._prefix
+        if version != snapshot.version:
+            prefix = PROMPT_PREFIX.format(product_info=snapshot.training_data("product"),
+                                          offers_info=snapshot.training_data("offer"),
+                                          refund_info=snapshot.training_data("refund"))
+            self._prefix = (snapshot.version, prefix)
+        return prefix
+
+    def plan_response(self, user_query, user_id, recent_conv=None):
+        """
+        Fetch dynamically updated training data and use it in the response generation.
+        `recent_conv` (newest first) skips the history lookup when the caller already has it.
+        """
+        if recent_conv is None:
+            recent_conv = self.memory.get_recent_conversations(user_id)
+        history_text = "\n".join([f"User: {q}\nAgent: {r}" for q, r in recent_conv]) if recent_conv else "None"
+
+        prompt = f"{self.prompt_prefix()}{history_text}\n\nUser Query: {user_query}{PROMPT_SUFFIX}"
         response = self.model.generate_content(prompt)
         full_response = response.text.strip()
 
@@ -156,7 +320,8 @@ Provide a concise plan in green followed by the final answer in yellow.
 def main():
     agent = CustomerSupportAgent()
     user_id = input("Enter your user ID: ")
-    print("\nCustomer Support Chat Session. Type 'exit' to end.\n")
+    print("\nCustomer Support Chat Session. Type 'update' to change training data, 'exit' to end.")
+    print("To serve many users at once, run agents/support_server.py instead.\n")
 
     while True:
         user_query = input("You: ")
@@ -164,11 +329,7 @@ def main():
             print("Chat session ended.")
             break
 
-        response = agent.respond(user_id, user_query)
-        print(f"Agent: {response}")
-
-        train_prompt = input("\nDo you want to update any information? (yes/no): ")
-        if train_prompt.lower() == "yes":
+        if user_query.lower() == "update":
             info_type = input("Enter info type (product/offer/refund): ")
             new_content = input("Enter the new info content: ")
             if info_type == "offer":
@@ -177,6 +338,10 @@ def main():
             else:
                 agent.update_training(info_type, new_content)
             print("Training data updated successfully.\n")
+            continue
+
+        response = agent.respond(user_id, user_query)
+        print(f"Agent: {response}")
 
 if __name__ == "__main__":
     main()
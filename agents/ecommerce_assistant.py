@@ -1,31 +1,174 @@
 import json
-import google.generativeai as genai
+import logging
+import os
+import sys
+import threading
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
+
+logger = logging.getLogger(__name__)
+
+# Order storage: an append-only journal next to the orders.json snapshot.
+#   orders.json           - snapshot dict {customer request: order info}, same format as before
+#   orders.journal        - JSONL records {"key", "value"} appended since the snapshot
+#   orders.journal.sealed - journal being folded into the snapshot by a running compaction
+# Every record is a put of the latest value, so replaying snapshot + sealed + journal
+# in that order rebuilds the index even if a compaction was interrupted part way.
+# A leftover sealed journal (crash or failed compaction) is folded into the snapshot
+# before a new one is sealed, so it is never overwritten unreplayed.
+class OrderJournal:
+    def __init__(self, snapshot_file="orders.json", fsync_interval=0.05, compact_min_records=1000):
+        self.snapshot_file = snapshot_file
+        self.journal_file = os.path.splitext(snapshot_file)[0] + ".journal"
+        self.sealed_file = self.journal_file + ".sealed"
+        self.fsync_interval = fsync_interval  # Seconds between batched fsyncs; 0 fsyncs every write
+        self.compact_min_records = compact_min_records
+        self._lock = threading.Lock()
+        self._compaction_lock = threading.Lock()  # Only one sealed journal at a time
+        self._dirty = False
+        self._compacting = False
+        self._stop = threading.Event()
+        self.orders = self._load()
+        self._fold_sealed(self.orders)  # Finish a compaction interrupted by a crash
+        self.records = 0  # Records in the active journal
+        self.journal = open(self.journal_file, "ab")
+        self._flusher = threading.Thread(target=self._flush_loop, name="order-journal", daemon=True)
+        self._flusher.start()
+
+    # -------------------------------
+    # Recovery
+    # -------------------------------
+    def _load(self):
+        orders = {}
+        try:
+            with open(self.snapshot_file, "r") as f:
+                orders = json.load(f)
+        except FileNotFoundError:
+            pass
+        self._replay(self.sealed_file, orders)
+        self._replay(self.journal_file, orders)
+        return orders
+
+    def _replay(self, path, orders):
+        """Applies a journal; a partially written last record is dropped and truncated away."""
+        if not os.path.exists(path):
+            return
+        good_bytes = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Crash mid-append
+                good_bytes += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    logger.warning("Skipping corrupt order record in %s at byte %d", path, good_bytes - len(line))
+                    continue
+                orders[record["key"]] = record["value"]
+        if good_bytes != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_bytes)
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def put(self, key, value):
+        """Records an order with one append; durable within `fsync_interval` seconds."""
+        line = (json.dumps({"key": key, "value": value}) + "\n").encode("utf-8")
+        with self._lock:
+            self.journal.write(line)
+            self.journal.flush()
+            self.orders[key] = value
+            self.records += 1
+            if self.fsync_interval:
+                self._dirty = True
+            else:
+                os.fsync(self.journal.fileno())
+            if not self._compacting and self.records >= max(self.compact_min_records, len(self.orders)):
+                self._compacting = True
+                threading.Thread(target=self._compact_in_background, name="order-compaction", daemon=True).start()
+
+    def sync(self):
+        with self._lock:
+            if self._dirty:
+                os.fsync(self.journal.fileno())
+                self._dirty = False
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.fsync_interval or 1.0):
+            self.sync()
+
+    def _write_snapshot(self, orders):
+        tmp_path = self.snapshot_file + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(orders, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.snapshot_file)
+
+    def _fold_sealed(self, orders):
+        """Writes `orders` (which already include the sealed journal) as the snapshot and drops the sealed file."""
+        if os.path.exists(self.sealed_file):
+            self._write_snapshot(orders)
+            os.remove(self.sealed_file)
+
+    def compact(self):
+        """Folds the journal into a new snapshot; writers only wait for the journal rotation."""
+        try:
+            with self._compaction_lock:
+                if os.path.exists(self.sealed_file):  # Left by a compaction that failed after sealing
+                    with self._lock:
+                        orders = dict(self.orders)
+                    self._fold_sealed(orders)
+                with self._lock:
+                    self.journal.flush()
+                    os.fsync(self.journal.fileno())
+                    self._dirty = False
+                    self.journal.close()
+                    os.replace(self.journal_file, self.sealed_file)
+                    self.journal = open(self.journal_file, "ab")
+                    self.records = 0
+                    orders = dict(self.orders)
+                self._write_snapshot(orders)
+                os.remove(self.sealed_file)
+        finally:
+            with self._lock:
+                self._compacting = False
+
+    def _compact_in_background(self):
+        try:
+            self.compact()
+        except Exception:
+            logger.exception("Order journal compaction failed; the next one will retry")
+
+    def close(self):
+        self._stop.set()
+        self._flusher.join()
+        with self._compaction_lock, self._lock:
+            self.journal.flush()
+            os.fsync(self.journal.fileno())
+            self.journal.close()
+
 class ECommerceAgent:
     def __init__(self, model_name="gemini-2.0-flash", memory_file="orders.json"):
-        self.model = genai.GenerativeModel(model_name)
+        self.model = get_client().model(model_name, cache_namespace="ecommerce")
         self.memory_file = memory_file
-        self.load_memory()
-    
-    def load_memory(self):
-        try:
-            with open(self.memory_file, "r") as f:
-                self.memory = json.load(f)
-        except FileNotFoundError:
-            self.memory = {}
-    
-    def save_memory(self):
-        with open(self.memory_file, "w") as f:
-            json.dump(self.memory, f)
-    
+        self.orders = OrderJournal(memory_file)
+        self.memory = self.orders.orders  # In-memory index of all orders
+
     def handle_order(self, customer_request):
         """Processes orders and provides shopping recommendations."""
         prompt = f"Customer Request: {customer_request}\nProvide relevant product recommendations."
         response = self.model.generate_content(prompt)
         order_info = response.text.strip()
-        self.memory[customer_request] = order_info
-        self.save_memory()
+        self.orders.put(customer_request, order_info)
         return order_info
 
+    def close(self):
+        self.orders.close()
+
 # Example Usage
-ecom_agent = ECommerceAgent()
-print(ecom_agent.handle_order("I need a new laptop for gaming."))
+if __name__ == "__main__":
+    ecom_agent = ECommerceAgent()
+    print(ecom_agent.handle_order("I need a new laptop for gaming."))
+    ecom_agent.close()
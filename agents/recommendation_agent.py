@@ -1,42 +1,180 @@
-import google.generativeai as genai
+import json
 import os
 import pickle
+import sys
+from collections import OrderedDict
+import numpy as np
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
+from text_vectors import hash_embedding
 
-# Set up Gemini API key
-GEMINI_API_KEY = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=GEMINI_API_KEY)
+# Preference memory: past (preferences, recommendation) pairs with their embeddings
+# in a fixed-capacity float32 matrix, looked up by vectorized cosine similarity.
+# On disk (a directory):
+#   vectors.f32    - memory-mapped (capacity, dim) matrix; only the changed row is written
+#   entries.jsonl  - append-only {"slot", "key", "preferences", "recommendation"} records,
+#                    the last record for a slot wins; rewritten when it grows past 2 x capacity
+# The least recently used entry is evicted once the matrix is full.
+class PreferenceMemory:
+    def __init__(self, directory="recommendation_memory", capacity=10000, dim=256):
+        self.directory = directory
+        self.capacity = capacity
+        self.dim = dim
+        self.slots = OrderedDict()  # normalized key -> slot, least recently used first
+        self.entries = [None] * capacity  # slot -> {"key", "preferences", "recommendation"}
+        self.log_records = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self.log = open(self._path("entries.jsonl"), "a")
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    @staticmethod
+    def normalize(preferences):
+        """Order- and case-insensitive key: "AI books, Tech gadgets" == "tech gadgets, ai books"."""
+        items = (" ".join(item.lower().split()) for item in preferences.split(","))
+        return ", ".join(sorted(item for item in items if item))
+
+    def _load(self):
+        path = self._path("entries.jsonl")
+        written = {}  # slot -> position of its last record, which gives the LRU order
+        torn = False
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                for position, line in enumerate(f):
+                    if not line.endswith("\n"):
+                        torn = True  # Partially written last record; the log is rewritten below
+                        break
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        continue
+                    if record["slot"] < self.capacity:
+                        self.entries[record["slot"]] = record
+                        written[record["slot"]] = position
+                    self.log_records += 1
+        for slot in sorted(written, key=written.get):
+            key = self.entries[slot]["key"]
+            old = self.slots.pop(key, None)
+            if old is not None:
+                self.entries[old] = None  # Superseded by a later slot for the same key
+            self.slots[key] = slot
+
+        vectors_path = self._path("vectors.f32")
+        expected_size = self.capacity * self.dim * 4
+        fresh = not os.path.exists(vectors_path) or os.path.getsize(vectors_path) != expected_size
+        self.vectors = np.memmap(vectors_path, dtype="float32", mode="w+" if fresh else "r+",
+                                 shape=(self.capacity, self.dim))
+        if fresh:  # New store, or capacity/dim changed: re-embed what the log has
+            for key, slot in self.slots.items():
+                self.vectors[slot] = hash_embedding(key, self.dim)
+        self.used = np.zeros(self.capacity, dtype=bool)
+        self.used[list(self.slots.values())] = True
+        self.free = list(np.flatnonzero(~self.used)[::-1])  # Unused slots, lowest last
+        self._rewrite_log_if_needed(force=torn or (fresh and bool(self.slots)))
+
+    def __len__(self):
+        return len(self.slots)
+
+    def get(self, preferences):
+        slot = self.slots.get(self.normalize(preferences))
+        return self.entries[slot]["recommendation"] if slot is not None else None
+
+    def nearest(self, preferences, k=3, min_score=0.5):
+        """Returns up to k (preferences, recommendation, score) of the most similar past profiles."""
+        if not self.slots:
+            return []
+        query = hash_embedding(self.normalize(preferences), self.dim)
+        scores = np.where(self.used, self.vectors @ query, -np.inf)
+        k = min(k, len(self.slots))
+        top = np.argpartition(-scores, k - 1)[:k]
+        results = []
+        for slot in top[np.argsort(-scores[top])]:
+            if scores[slot] < min_score:
+                break
+            entry = self.entries[slot]
+            self.slots.move_to_end(entry["key"])
+            results.append((entry["preferences"], entry["recommendation"], float(scores[slot])))
+        return results
+
+    def put(self, preferences, recommendation):
+        key = self.normalize(preferences)
+        slot = self.slots.pop(key, None)
+        if slot is None:
+            if self.free:
+                slot = int(self.free.pop())
+            else:
+                _, slot = self.slots.popitem(last=False)  # Evict the least recently used entry
+            self.vectors[slot] = hash_embedding(key, self.dim)
+            self.used[slot] = True
+        self.slots[key] = slot
+        self.entries[slot] = {"slot": slot, "key": key, "preferences": preferences, "recommendation": recommendation}
+        self.log.write(json.dumps(self.entries[slot]) + "\n")
+        self.log.flush()
+        self.log_records += 1
+        self._rewrite_log_if_needed()
+
+    def _rewrite_log_if_needed(self, force=False):
+        """Rewrites the log with one record per live entry, in LRU order."""
+        if not force and self.log_records <= 2 * self.capacity:
+            return
+        self.vectors.flush()  # Rows must be on disk before the log that references them
+        tmp_path = self._path("entries.jsonl.tmp")
+        with open(tmp_path, "w") as f:
+            for slot in self.slots.values():
+                f.write(json.dumps(self.entries[slot]) + "\n")
+        log = getattr(self, "log", None)
+        if log is not None:
+            log.close()
+        os.replace(tmp_path, self._path("entries.jsonl"))
+        if log is not None:
+            self.log = open(self._path("entries.jsonl"), "a")
+        self.log_records = len(self.slots)
+
+    def close(self):
+        self.vectors.flush()
+        self.log.close()
 
 class RecommendationAgent:
-    def __init__(self, model_name="gemini-2.0-flash", memory_file="recommendation_memory.pkl"):
-        self.model = genai.GenerativeModel(model_name)
+    def __init__(self, model_name="gemini-2.0-flash", memory_dir="recommendation_memory",
+                 memory_file="recommendation_memory.pkl", capacity=10000):
+        self.model = get_client().model(model_name, cache_namespace="recommendation")
+        self.memory = PreferenceMemory(memory_dir, capacity)
         self.memory_file = memory_file
-        self.memory = self.load_memory()
-    
-    def load_memory(self):
+        if not len(self.memory):
+            self.import_legacy_memory()
+
+    def import_legacy_memory(self):
+        """One-time import of the pickled {preferences: recommendation} dict used before."""
         try:
             with open(self.memory_file, "rb") as f:
-                return pickle.load(f)
+                legacy = pickle.load(f)
         except FileNotFoundError:
-            return {}
+            return
+        for preferences, recommendation in legacy.items():
+            self.memory.put(preferences, recommendation)
 
-    def save_memory(self):
-        with open(self.memory_file, "wb") as f:
-            pickle.dump(self.memory, f)
-    
     def recommend(self, user_preferences):
         """Generates personalized recommendations based on user preferences."""
+        similar = self.memory.nearest(user_preferences)
+        past = "\n".join(f"- For \"{preferences}\": {recommendation}" for preferences, recommendation, _ in similar)
         prompt = f"""
         User Preferences: {user_preferences}
-        Past Interactions: {self.memory.get(user_preferences, "No past data")}
-        
+        Past Interactions: {past or "No past data"}
+
         Recommend three personalized items.
         """
         response = self.model.generate_content(prompt)
         recommendation = response.text.strip()
-        self.memory[user_preferences] = recommendation
-        self.save_memory()
+        self.memory.put(user_preferences, recommendation)
         return recommendation
 
+    def close(self):
+        self.memory.close()
+
 # Example Usage
-agent = RecommendationAgent()
-print(agent.recommend("Tech gadgets, AI books, productivity tools"))
+if __name__ == "__main__":
+    agent = RecommendationAgent()
+    print(agent.recommend("Tech gadgets, AI books, productivity tools"))
+    agent.close()
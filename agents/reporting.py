@@ -1,18 +1,93 @@
 import pandas as pd
-import google.generativeai as genai
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
+
+COLUMNS = ["Query", "Report"]
+EXPORT_CHUNK_ROWS = 10000
+
 class ReportingAgent:
     def __init__(self, model_name="gemini-2.0-flash"):
-        self.model = genai.GenerativeModel(model_name)
-        self.data = pd.DataFrame(columns=["Query", "Report"])
+        self.model = get_client().model(model_name, cache_namespace="reporting")
+        self.columns = {column: [] for column in COLUMNS}  # Columnar row buffer; appends are O(1)
+        self._frame = None  # DataFrame built from the buffer, reused until new rows arrive
 
-    def generate_report(self, query):
-        """Analyzes data and generates a report."""
+    @property
+    def data(self):
+        """All reports as a DataFrame, built on demand."""
+        if self._frame is None or len(self._frame) != len(self):
+            self._frame = pd.DataFrame(self.columns, columns=COLUMNS)
+        return self._frame
+
+    def __len__(self):
+        return len(self.columns["Query"])
+
+    def _append(self, queries, reports):
+        self.columns["Query"].extend(queries)
+        self.columns["Report"].extend(reports)
+
+    def _report(self, query):
         prompt = f"Analyze data for: {query}\nGenerate a professional report."
         response = self.model.generate_content(prompt)
-        report = response.text.strip()
-        self.data = self.data.append({"Query": query, "Report": report}, ignore_index=True)
+        return response.text.strip()
+
+    def generate_report(self, query):
+        """Analyzes data and generates a report."""
+        report = self._report(query)
+        self._append([query], [report])
         return report
 
+    def generate_reports(self, queries, max_workers=16):
+        """
+        Generates reports for many queries with concurrent model calls (still bounded by
+        the shared client's rate limit) and appends them in one go, in query order.
+        If any call fails, the successful reports are kept and the first error is raised.
+        """
+        queries = list(queries)
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(self._report, query) for query in queries]
+        done, first_error = [], None
+        for query, future in zip(queries, futures):
+            error = future.exception()
+            if error is None:
+                done.append((query, future.result()))
+            elif first_error is None:
+                first_error = error
+        self._append([query for query, _ in done], [report for _, report in done])
+        if first_error is not None:
+            raise first_error
+        return [report for _, report in done]
+
+    def export(self, path, format="parquet", chunk_rows=EXPORT_CHUNK_ROWS, clear=False):
+        """
+        Writes the buffered reports to a Parquet or Arrow IPC file `chunk_rows` at a time,
+        so the full table never has to exist in memory at once. With `clear`, the buffer is
+        emptied afterwards (e.g. between batches of a nightly run).
+        """
+        import pyarrow as pa
+        schema = pa.schema([(column, pa.string()) for column in COLUMNS])
+        if format == "parquet":
+            import pyarrow.parquet as pq
+            writer = pq.ParquetWriter(path, schema)
+            write = writer.write_table
+        elif format in ("arrow", "feather"):
+            writer = pa.ipc.new_file(path, schema)
+            write = writer.write_table
+        else:
+            raise ValueError(f"Unknown export format: {format}")
+        try:
+            for start in range(0, len(self), chunk_rows):
+                write(pa.Table.from_pydict({column: values[start:start + chunk_rows]
+                                            for column, values in self.columns.items()}, schema=schema))
+        finally:
+            writer.close()
+        if clear:
+            self.columns = {column: [] for column in COLUMNS}
+            self._frame = None
+
 # Example Usage
-report_agent = ReportingAgent()
-print(report_agent.generate_report("Market trends in renewable energy"))
+if __name__ == "__main__":
+    report_agent = ReportingAgent()
+    print(report_agent.generate_report("Market trends in renewable energy"))
@@ -1,27 +1,181 @@
 import sqlite3
-import google.generativeai as genai
+import os
+import sys
+import threading
+import time
+import uuid
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from llm_client import get_client
+
+# Research cache with single-flight:
+#   research_cache     - one row per normalized query (primary key), so lookups use the index
+#   research_inflight  - leases for queries some process is currently asking the model about
+# Within a process, concurrent searches for the same query wait on the first one's Event.
+# Across processes, the first to take the lease calls the model; the others poll the
+# cache until the answer lands or the lease expires (then one of them takes over).
+LEASE_SECONDS = 120.0
+POLL_INTERVAL = 0.05
+
+def normalize_query(topic):
+    """Cache key: case-, whitespace- and trailing-punctuation-insensitive."""
+    return " ".join(topic.lower().split()).rstrip("?.! ")
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.answer = None
+        self.error = None
+
 class ResearchAgent:
-    def __init__(self, model_name="gemini-2.0-flash", db_file="research_memory.db"):
-        self.model = genai.GenerativeModel(model_name)
-        self.conn = sqlite3.connect(db_file)
-        self.cursor = self.conn.cursor()
-        self.cursor.execute("CREATE TABLE IF NOT EXISTS research (query TEXT, response TEXT)")
-    
+    def __init__(self, model_name="gemini-2.0-flash", db_file="research_memory.db", lease_seconds=LEASE_SECONDS):
+        self.model = get_client().model(model_name)
+        self.db_file = db_file
+        self.lease_seconds = lease_seconds
+        self.owner = uuid.uuid4().hex  # Lease owner id for this agent instance
+        self._local = threading.local()
+        self._flights = {}  # query key -> _Flight of the in-process leader
+        self._lock = threading.Lock()
+        self.stats = {"cache_hits": 0, "model_calls": 0, "coalesced": 0, "lease_waits": 0}
+        self.setup_db()
+
+    @property
+    def conn(self):
+        """This thread's connection."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = self._local.conn = sqlite3.connect(self.db_file, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+
+    def setup_db(self):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_cache (
+                    query_key TEXT PRIMARY KEY,
+                    query TEXT,
+                    response TEXT,
+                    created_at REAL
+                )
+            """)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS research_inflight (
+                    query_key TEXT PRIMARY KEY,
+                    owner TEXT,
+                    expires_at REAL
+                )
+            """)
+            # One-time migration of the old unindexed table; the first response per key wins.
+            legacy = conn.execute("SELECT name FROM sqlite_master WHERE type='table' AND name='research'").fetchone()
+            if legacy:
+                for query, response in conn.execute("SELECT query, response FROM research ORDER BY rowid").fetchall():
+                    conn.execute("INSERT OR IGNORE INTO research_cache VALUES (?, ?, ?, ?)",
+                                 (normalize_query(query), query, response, time.time()))
+                conn.execute("ALTER TABLE research RENAME TO research_legacy")
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _count(self, field):
+        with self._lock:
+            self.stats[field] += 1
+
+    def _cached(self, key):
+        row = self.conn.execute("SELECT response FROM research_cache WHERE query_key=?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _take_lease(self, key):
+        """Returns (cached answer, got lease); the cache is re-checked inside the same transaction."""
+        now = time.time()
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            answer = self._cached(key)
+            taken = False
+            if answer is None:
+                taken = conn.execute("""
+                    INSERT INTO research_inflight (query_key, owner, expires_at) VALUES (?, ?, ?)
+                    ON CONFLICT(query_key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at
+                    WHERE research_inflight.expires_at < ?
+                """, (key, self.owner, now + self.lease_seconds, now)).rowcount > 0
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        return answer, taken
+
+    def _release_lease(self, key, topic=None, answer=None):
+        conn = self.conn
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            if answer is not None:
+                conn.execute("INSERT OR REPLACE INTO research_cache VALUES (?, ?, ?, ?)",
+                             (key, topic, answer, time.time()))
+            conn.execute("DELETE FROM research_inflight WHERE query_key=? AND owner=?", (key, self.owner))
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+
+    def _research(self, key, topic):
+        """Cache, then lease, then model; waits for another process that holds the lease."""
+        while True:
+            answer, taken = self._take_lease(key)
+            if answer is not None:
+                self._count("cache_hits")
+                return answer
+            if taken:
+                break
+            self._count("lease_waits")
+            time.sleep(POLL_INTERVAL)  # Another process is asking the model right now
+
+        try:
+            self._count("model_calls")
+            prompt = f"Conduct an in-depth research summary on: {topic}"
+            response = self.model.generate_content(prompt)
+            answer = response.text.strip()
+        except BaseException:
+            self._release_lease(key)
+            raise
+        self._release_lease(key, topic, answer)
+        return answer
+
     def search(self, topic):
         """Generates research-based summaries."""
-        self.cursor.execute("SELECT response FROM research WHERE query=?", (topic,))
-        result = self.cursor.fetchone()
-        if result:
-            return result[0]
-        
-        prompt = f"Conduct an in-depth research summary on: {topic}"
-        response = self.model.generate_content(prompt)
-        answer = response.text.strip()
-        
-        self.cursor.execute("INSERT INTO research (query, response) VALUES (?, ?)", (topic, answer))
-        self.conn.commit()
-        return answer
+        key = normalize_query(topic)
+        answer = self._cached(key)
+        if answer is not None:
+            self._count("cache_hits")
+            return answer
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+            else:
+                self.stats["coalesced"] += 1
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.answer
+
+        try:
+            flight.answer = self._research(key, topic)
+        except BaseException as e:
+            flight.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.done.set()
+        return flight.answer
 
 # Example Usage
-research_agent = ResearchAgent()
-print(research_agent.search("Impact of AI in healthcare"))
+if __name__ == "__main__":
+    research_agent = ResearchAgent()
+    print(research_agent.search("Impact of AI in healthcare"))
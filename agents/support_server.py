@@ -0,0 +1,152 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+
+# -------------------------------
+# Multi-session server for CustomerSupportAgent
+# -------------------------------
+# One event loop serves many user sessions. Recent history lives in a bounded
+# LRU of sessions (loaded from LongTermMemory on a miss), model and database
+# calls run on a worker pool sized to the model concurrency, and requests beyond
+# `max_pending` are rejected immediately instead of queueing without bound.
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from agents.customer_support import CustomerSupportAgent
+
+HISTORY_TURNS = 3  # Matches LongTermMemory.get_recent_conversations
+
+
+class ServerBusy(Exception):
+    pass
+
+
+class Session:
+    def __init__(self, history):
+        self.history = deque(history, maxlen=HISTORY_TURNS)  # Newest first, like the database query
+        self.lock = asyncio.Lock()  # One turn at a time per user, so history stays ordered
+
+
+class SupportServer:
+    def __init__(self, agent=None, max_concurrency=16, max_pending=256, max_sessions=10000):
+        self.agent = agent or CustomerSupportAgent()
+        self.max_pending = max_pending
+        self.max_sessions = max_sessions
+        self.executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="support")
+        self.semaphore = asyncio.Semaphore(max_concurrency)
+        self.sessions = OrderedDict()  # user_id -> Session, least recently used first
+        self.pending = 0
+        self.stats = {"handled": 0, "rejected": 0, "session_loads": 0, "evictions": 0}
+
+    async def _run(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def _session(self, user_id):
+        session = self.sessions.get(user_id)
+        if session is None:
+            history = await self._run(self.agent.memory.get_recent_conversations, user_id, HISTORY_TURNS)
+            self.stats["session_loads"] += 1
+            session = self.sessions.setdefault(user_id, Session(history))  # Another turn may have loaded it meanwhile
+        self.sessions.move_to_end(user_id)
+        self._evict()
+        return session
+
+    def _evict(self):
+        """Drops least recently used sessions beyond the cap, skipping ones with a turn in progress."""
+        excess = len(self.sessions) - self.max_sessions
+        for user_id in list(self.sessions):
+            if excess <= 0:
+                break
+            if not self.sessions[user_id].lock.locked():
+                del self.sessions[user_id]
+                self.stats["evictions"] += 1
+                excess -= 1
+
+    async def handle(self, user_id, user_query):
+        """Answers one turn for `user_id`; raises ServerBusy when too many turns are already waiting."""
+        if self.pending >= self.max_pending:
+            self.stats["rejected"] += 1
+            raise ServerBusy(f"{self.pending} requests in flight")
+        self.pending += 1
+        try:
+            session = await self._session(user_id)
+            async with session.lock:
+                async with self.semaphore:
+                    _, answer = await self._run(self.agent.plan_response, user_query, user_id, list(session.history))
+                session.history.appendleft((user_query, answer))
+                self.agent.memory.store_conversation(user_id, user_query, answer)  # Queued, doesn't block
+            self.stats["handled"] += 1
+            return answer
+        finally:
+            self.pending -= 1
+
+    async def handle_connection(self, reader, writer):
+        """JSON lines: {"user_id", "query", "id"?} in, {"id", "answer"} or {"id", "error"} out."""
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line):
+            request_id = None
+            try:
+                request = json.loads(line)
+                request_id = request.get("id")
+                user_id, query = request["user_id"], request["query"]
+            except (ValueError, KeyError, TypeError, AttributeError) as e:
+                reply = {"id": request_id, "error": "bad request", "detail": str(e)}
+            else:
+                try:
+                    reply = {"id": request_id, "answer": await self.handle(user_id, query)}
+                except ServerBusy as e:
+                    reply = {"id": request_id, "error": "busy", "detail": str(e)}
+                except Exception as e:  # e.g. the model call failed; the connection stays usable
+                    reply = {"id": request_id, "error": "internal", "detail": str(e)}
+            async with write_lock:
+                writer.write((json.dumps(reply) + "\n").encode("utf-8"))
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if line.strip():
+                    task = asyncio.create_task(answer(line))  # Turns on one connection run concurrently
+                    tasks.add(task)
+                    task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass  # Client went away; its in-flight turns are still stored
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=1 << 20)
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.agent.memory.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Customer support JSON-lines server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--max-concurrency", type=int, default=16)
+    parser.add_argument("--max-pending", type=int, default=256)
+    parser.add_argument("--max-sessions", type=int, default=10000)
+    args = parser.parse_args()
+
+    server = SupportServer(max_concurrency=args.max_concurrency, max_pending=args.max_pending,
+                           max_sessions=args.max_sessions)
+    print(f"Serving customer support on {args.host}:{args.port}")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
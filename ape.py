@@ -1,12 +1,16 @@
-import google.generativeai as genai
-import os
+import math
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
+from llm_client import get_client
 load_dotenv()
-# Configure Gemini API (Replace with your actual API key)
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
-# Load Gemini model
-gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+# Gemini model (shared, rate-limited client; reads GOOGLE_API_KEY), resolved on first use
+# so importing this module works without an API key
+def gemini_model():
+    return get_client().model("gemini-2.0-flash")
 
 # Step 1: Generate Candidate Instructions
 def generate_instructions(task_description, num_candidates=5):
@@ -18,8 +22,24 @@ def generate_instructions(task_description, num_candidates=5):
     Provide each instruction as a separate numbered list.
     """
     
-    response = gemini_model.generate_content(prompt)
-    return response.text.split("\n") if response.text else []
+    response = gemini_model().generate_content(prompt)
+    return clean_candidates(response.text.split("\n")) if response.text else []
+
+def clean_candidates(lines):
+    """Strips list numbering and markdown, drops headings and blank lines, and removes duplicates."""
+    candidates = []
+    seen = set()
+    for line in lines:
+        text = re.sub(r"^\s*(?:[-*•]|\d+[.)])\s*", "", line)
+        text = text.replace("**", "").strip()
+        if not text or text.endswith(":"):
+            continue
+        key = " ".join(text.lower().split())
+        if key in seen:
+            continue
+        seen.add(key)
+        candidates.append(text)
+    return candidates
 
 # Step 2: Evaluate Instructions by Testing on a Sample Input
 def evaluate_instruction(instruction, sample_input):
@@ -31,33 +51,102 @@ def evaluate_instruction(instruction, sample_input):
     Execute the instruction on the given input and return the response.
     """
     
-    response = gemini_model.generate_content(prompt)
+    response = gemini_model().generate_content(prompt)
     return response.text.strip()
 
 # Step 3: Select the Best Instruction
-def select_best_instruction(task_description, sample_input):
+def score_output(output):
+    """Scores an evaluation result (here, we use length as a proxy for quality)."""
+    return len(output)
+
+class EvaluationEngine:
+    """Runs candidate x input evaluations on a bounded worker pool and counts model calls."""
+    def __init__(self, max_workers=8, evaluate=None):
+        self.max_workers = max_workers
+        self.evaluate = evaluate or evaluate_instruction
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def _run(self, instruction, sample_input):
+        with self._lock:
+            self.calls += 1
+        return self.evaluate(instruction, sample_input)
+
+    def evaluate_pairs(self, pairs):
+        """Evaluates (instruction, input) pairs in parallel; returns outputs in pair order."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            return list(executor.map(lambda pair: self._run(*pair), pairs))
+
+def successive_halving(candidates, sample_inputs, engine, eta=2, min_inputs=1):
+    """
+    Evaluates every candidate on a few inputs, keeps the best 1/eta, and gives
+    the survivors eta times more inputs, until one candidate is left or the
+    inputs run out. Returns (best instruction, its output on the first input).
+    """
+    survivors = list(candidates)
+    scores = {instruction: [] for instruction in survivors}
+    first_outputs = {}
+    budget = min_inputs
+    evaluated = 0  # Inputs every survivor has been evaluated on so far
+
+    while True:
+        new_inputs = sample_inputs[evaluated:budget]
+        pairs = [(instruction, sample_input) for instruction in survivors for sample_input in new_inputs]
+        for (instruction, _), output in zip(pairs, engine.evaluate_pairs(pairs)):
+            first_outputs.setdefault(instruction, output)
+            scores[instruction].append(score_output(output))
+        evaluated = budget
+
+        survivors.sort(key=lambda instr: sum(scores[instr]) / len(scores[instr]), reverse=True)
+        if len(survivors) == 1 or evaluated >= len(sample_inputs):
+            break
+        survivors = survivors[:max(1, math.ceil(len(survivors) / eta))]
+        if len(survivors) == 1:
+            break  # The winner is decided; more inputs would only re-score it
+        budget = min(len(sample_inputs), budget * eta)
+
+    best = survivors[0]
+    return best, first_outputs[best]
+
+def select_best_instruction_exhaustive(candidates, sample_inputs, engine):
+    """Baseline: every candidate on every input."""
+    pairs = [(instruction, sample_input) for instruction in candidates for sample_input in sample_inputs]
+    evaluations = {}
+    for (instruction, _), output in zip(pairs, engine.evaluate_pairs(pairs)):
+        evaluations.setdefault(instruction, []).append(output)
+    best = max(evaluations, key=lambda instr: sum(map(score_output, evaluations[instr])) / len(evaluations[instr]))
+    return best, evaluations[best][0]
+
+def select_best_instruction(task_description, sample_input, max_workers=8, eta=2):
     """Generates multiple instructions, evaluates them, and selects the best one."""
     candidates = generate_instructions(task_description)
     
     if not candidates:
         return "Failed to generate instructions."
 
-    evaluations = {}
-    
-    for instruction in candidates:
-        result = evaluate_instruction(instruction, sample_input)
-        evaluations[instruction] = result
+    sample_inputs = [sample_input] if isinstance(sample_input, str) else list(sample_input)
+    engine = EvaluationEngine(max_workers=max_workers)
+    return successive_halving(candidates, sample_inputs, engine, eta=eta)
 
-    # Select the best instruction based on response quality (Here, we use length as a proxy for testing)
-    best_instruction = max(evaluations, key=lambda instr: len(evaluations[instr]))
-    
-    return best_instruction, evaluations[best_instruction]
+def compare_strategies(candidates, sample_inputs, max_workers=8, eta=2, evaluate=None):
+    """Reports wall-clock time and model calls for successive halving vs. the serial exhaustive loop."""
+    report = {}
+    for name, strategy, workers in [
+        ("exhaustive_serial", select_best_instruction_exhaustive, 1),
+        ("successive_halving", lambda c, i, e: successive_halving(c, i, e, eta=eta), max_workers),
+    ]:
+        engine = EvaluationEngine(max_workers=workers, evaluate=evaluate)
+        start = time.perf_counter()
+        best, _ = strategy(candidates, sample_inputs, engine)
+        report[name] = {"best": best, "calls": engine.calls, "seconds": time.perf_counter() - start}
+    return report
 
 # Example Task
-task_description = "Summarize a paragraph in one sentence."
-sample_input = "The remarkable success of pretrained language models has motivated the study of what kinds of knowledge these models learn during pretraining. Reformulating tasks as fill-in-the-blanks problems (e.g., cloze tests) is a natural approach for gauging such knowledge, however, its usage is limited by the manual effort and guesswork required to write suitable prompts. To address this, we develop AutoPrompt, an automated method to create prompts for a diverse set of tasks, based on a gradient-guided search. Using AutoPrompt, we show that masked language models (MLMs) have an inherent capability to perform sentiment analysis and natural language inference without additional parameters or finetuning, sometimes achieving performance on par with recent state-of-the-art supervised models. We also show that our prompts elicit more accurate factual knowledge from MLMs than the manually created prompts on the LAMA benchmark, and that MLMs can be used as relation extractors more effectively than supervised relation extraction models. These results demonstrate that automatically generated prompts are a viable parameter-free alternative to existing probing methods, and as pretrained LMs become more sophisticated and capable, potentially a replacement for finetuning."
+if __name__ == "__main__":
+    task_description = "Summarize a paragraph in one sentence."
+    sample_input = "The remarkable success of pretrained language models has motivated the study of what kinds of knowledge these models learn during pretraining. Reformulating tasks as fill-in-the-blanks problems (e.g., cloze tests) is a natural approach for gauging such knowledge, however, its usage is limited by the manual effort and guesswork required to write suitable prompts. To address this, we develop AutoPrompt, an automated method to create prompts for a diverse set of tasks, based on a gradient-guided search. Using AutoPrompt, we show that masked language models (MLMs) have an inherent capability to perform sentiment analysis and natural language inference without additional parameters or finetuning, sometimes achieving performance on par with recent state-of-the-art supervised models. We also show that our prompts elicit more accurate factual knowledge from MLMs than the manually created prompts on the LAMA benchmark, and that MLMs can be used as relation extractors more effectively than supervised relation extraction models. These results demonstrate that automatically generated prompts are a viable parameter-free alternative to existing probing methods, and as pretrained LMs become more sophisticated and capable, potentially a replacement for finetuning."
 
-# Run APE
-best_prompt, output = select_best_instruction(task_description, sample_input)
-print("\nBest Generated Prompt:", best_prompt)
-print("\nExample Output:", output)
+    # Run APE
+    best_prompt, output = select_best_instruction(task_description, sample_input)
+    print("\nBest Generated Prompt:", best_prompt)
+    print("\nExample Output:", output)
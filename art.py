@@ -1,37 +1,83 @@
-import google.generativeai as genai
-import sympy as sp
-import requests
+import asyncio
 import os
+import re
+import requests
+import numpy as np
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from equation_solver import get_solver
+from llm_cache import ResponseCache
+from llm_client import get_client
+from text_vectors import hash_embedding, hash_embeddings
 load_dotenv()
-# Configure Gemini API (Replace with your actual API key)
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
-# Load Gemini model
-gemini_model = genai.GenerativeModel("gemini-2.0-flash")
+# Gemini model (shared, rate-limited client; reads GOOGLE_API_KEY), resolved on first use
+# so importing this module works without an API key
+def gemini_model():
+    return get_client().model("gemini-2.0-flash")
+
+# Shared HTTP session: pooled keep-alive connections, timeouts and retries on transient upstream errors.
+# The base URLs can point at a local stub server (see benchmarks/stub_http_server.py).
+WEATHER_URL = os.getenv("ART_WEATHER_URL", "https://wttr.in/{city}?format=%C+%t")
+COUNTRY_URL = os.getenv("ART_COUNTRY_URL", "https://restcountries.com/v3.1/name/{country}")
+HTTP_TIMEOUT = (3.05, 10)  # (connect, read) seconds
+HTTP_POOL_SIZE = 32
+
+def make_http_session(pool_size=HTTP_POOL_SIZE):
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
+
+http_session = make_http_session()
+
+# Per-tool result cache: weather goes stale in minutes, country data hardly ever changes.
+tool_cache = ResponseCache(max_entries=10000, ttls={"weather": 10 * 60, "country": 7 * 24 * 60 * 60})
+
+def cached_tool(namespace, argument, fetch):
+    """Returns a cached tool result, or fetches and caches it; failures are not cached."""
+    key = f"{namespace}:{' '.join(argument.lower().split())}"  # The tools share one cache
+    result = tool_cache.get(namespace, key)
+    if result is not None:
+        return result
+    result, ok = fetch(argument)
+    if ok:
+        tool_cache.put(namespace, key, result)
+    return result
 
 # Tool 1: Solve Equations using SymPy
+# Parsed once into a canonical form (cached), solved in sandboxed worker processes with a hard timeout.
 def solve_equation(equation):
     """Solves algebraic equations using symbolic reasoning."""
-    x = sp.Symbol('x')
-    try:
-        solution = sp.solve(equation, x)
-        return f"Solution: {solution}"
-    except Exception as e:
-        return f"Error solving equation: {str(e)}"
+    return get_solver().solve(equation)
+
+def solve_equations(equations):
+    """Solves a batch of equations in parallel; results are in input order."""
+    return get_solver().solve_many(equations)
 
 # Tool 2: Get Weather Information (Free Weather API)
+def _fetch_weather(city):
+    try:
+        response = http_session.get(WEATHER_URL.format(city=city), timeout=HTTP_TIMEOUT)
+    except requests.RequestException:
+        return "Failed to fetch weather.", False
+    if response.status_code == 200:
+        return f"Weather in {city}: {response.text}", True
+    return "Failed to fetch weather.", False
+
 def get_weather(city):
     """Fetch real-time weather using a free API."""
-    url = f"https://wttr.in/{city}?format=%C+%t"
-    response = requests.get(url)
-    return f"Weather in {city}: {response.text}" if response.status_code == 200 else "Failed to fetch weather."
+    return cached_tool("weather", city, _fetch_weather)
 
 # Tool 3: Get Country Information (REST API)
-def get_country_info(country):
-    """Fetch general information about a country."""
-    url = f"https://restcountries.com/v3.1/name/{country}"
-    response = requests.get(url).json()
+def _fetch_country_info(country):
+    try:
+        response = http_session.get(COUNTRY_URL.format(country=country), timeout=HTTP_TIMEOUT).json()
+    except (requests.RequestException, ValueError):
+        return "Failed to fetch country information.", False
     
     if isinstance(response, list) and len(response) > 0:
         data = response[0]
@@ -39,11 +85,128 @@ def get_country_info(country):
         capital = data.get("capital", ["Unknown"])[0]
         population = data.get("population", "Unknown")
         currency = list(data.get("currencies", {}).keys())[0] if "currencies" in data else "Unknown"
-        return f"Country: {name}, Capital: {capital}, Population: {population}, Currency: {currency}"
-    return "Failed to fetch country information."
+        return f"Country: {name}, Capital: {capital}, Population: {population}, Currency: {currency}", True
+    return "Failed to fetch country information.", False
+
+def get_country_info(country):
+    """Fetch general information about a country."""
+    return cached_tool("country", country, _fetch_country_info)
+
+# Local Router: pattern rules + a hashed-embedding classifier, so most queries skip the LLM
+ROUTE_EXAMPLES = {
+    "EQUATION": [
+        "solve x**2 - 4 = 0", "solve 2*x + 3 = 7", "find x if x**2 = 9", "what is x when 3*x - 1 = 5",
+        "solve the equation x**3 - x = 0", "x**2 + 2*x + 1 = 0",
+    ],
+    "WEATHER": [
+        "what is the weather in London", "weather in Paris today", "how hot is it in Tokyo",
+        "is it raining in Seattle", "temperature in Berlin", "what's the forecast for Madrid",
+    ],
+    "COUNTRY": [
+        "tell me about France", "what is the capital of Japan", "population of Brazil",
+        "information about Germany", "what currency does India use", "tell me about the country Kenya",
+    ],
+    "UNKNOWN": [
+        "who is the president of the USA", "write me a poem", "what is the meaning of life",
+        "recommend a good book", "how do I bake bread", "who won the world cup",
+    ],
+}
+# Names the COUNTRY rule may route locally; "tell me about <anything else>" goes to the LLM.
+COUNTRY_NAMES = frozenset(name.lower() for name in """
+Afghanistan|Albania|Algeria|Andorra|Angola|Antigua and Barbuda|Argentina|Armenia|Australia|Austria|
+Azerbaijan|Bahamas|Bahrain|Bangladesh|Barbados|Belarus|Belgium|Belize|Benin|Bhutan|Bolivia|
+Bosnia and Herzegovina|Botswana|Brazil|Brunei|Bulgaria|Burkina Faso|Burundi|Cabo Verde|Cape Verde|Cambodia|
+Cameroon|Canada|Central African Republic|Chad|Chile|China|Colombia|Comoros|Congo|Costa Rica|Croatia|Cuba|
+Cyprus|Czechia|Czech Republic|Democratic Republic of the Congo|Denmark|Djibouti|Dominica|Dominican Republic|
+East Timor|Timor-Leste|Ecuador|Egypt|El Salvador|Equatorial Guinea|Eritrea|Estonia|Eswatini|Swaziland|
+Ethiopia|Fiji|Finland|France|Gabon|Gambia|Georgia|Germany|Ghana|Greece|Grenada|Guatemala|Guinea|
+Guinea-Bissau|Guyana|Haiti|Honduras|Hungary|Iceland|India|Indonesia|Iran|Iraq|Ireland|Israel|Italy|
+Ivory Coast|Jamaica|Japan|Jordan|Kazakhstan|Kenya|Kiribati|Kosovo|Kuwait|Kyrgyzstan|Laos|Latvia|Lebanon|
+Lesotho|Liberia|Libya|Liechtenstein|Lithuania|Luxembourg|Madagascar|Malawi|Malaysia|Maldives|Mali|Malta|
+Marshall Islands|Mauritania|Mauritius|Mexico|Micronesia|Moldova|Monaco|Mongolia|Montenegro|Morocco|
+Mozambique|Myanmar|Burma|Namibia|Nauru|Nepal|Netherlands|Holland|New Zealand|Nicaragua|Niger|Nigeria|
+North Korea|North Macedonia|Norway|Oman|Pakistan|Palau|Palestine|Panama|Papua New Guinea|Paraguay|Peru|
+Philippines|Poland|Portugal|Qatar|Romania|Russia|Rwanda|Saint Kitts and Nevis|Saint Lucia|
+Saint Vincent and the Grenadines|Samoa|San Marino|Sao Tome and Principe|Saudi Arabia|Senegal|Serbia|
+Seychelles|Sierra Leone|Singapore|Slovakia|Slovenia|Solomon Islands|Somalia|South Africa|South Korea|Korea|
+South Sudan|Spain|Sri Lanka|Sudan|Suriname|Sweden|Switzerland|Syria|Taiwan|Tajikistan|Tanzania|Thailand|
+Togo|Tonga|Trinidad and Tobago|Tunisia|Turkey|Turkiye|Turkmenistan|Tuvalu|Uganda|Ukraine|
+United Arab Emirates|UAE|United Kingdom|UK|Great Britain|Britain|England|Scotland|Wales|United States|
+United States of America|USA|US|America|Uruguay|Uzbekistan|Vanuatu|Vatican City|Venezuela|Vietnam|
+Yemen|Zambia|Zimbabwe""".replace("\n", "").split("|"))
+
+def is_country(name):
+    name = " ".join(name.lower().split())
+    return name in COUNTRY_NAMES or (name.startswith("the ") and name[4:] in COUNTRY_NAMES)
+
+ROUTER_DIM = 512
+ROUTER_CONFIDENCE = 0.8  # Below this the query falls back to the LLM
+ROUTER_TEMPERATURE = 0.05
+
+def _build_label_index():
+    """Embeds the examples once and keeps one unit-length centroid per label."""
+    labels = list(ROUTE_EXAMPLES)
+    centroids = []
+    for label in labels:
+        centroid = hash_embeddings(ROUTE_EXAMPLES[label], ROUTER_DIM).mean(axis=0)
+        centroids.append(centroid / np.linalg.norm(centroid))
+    return labels, np.vstack(centroids)
+
+ROUTE_LABELS, ROUTE_CENTROIDS = _build_label_index()
+
+EQUATION_RULE = re.compile(r"^\s*(?:please\s+)?solve\s+(?:the\s+equation\s+)?(?P<arg>.+?)\s*\??$", re.IGNORECASE)
+BARE_EQUATION_RULE = re.compile(r"^(?P<arg>[\dx\s+\-*/^().]*x[\dx\s+\-*/^().]*(?:=[\dx\s+\-*/^().]+)?)$", re.IGNORECASE)
+WEATHER_RULE = re.compile(r"\bweather\s+(?:in|for|at)\s+(?P<arg>[A-Za-z][A-Za-z .'-]*?)\s*(?:today|now|right now)?\s*[?.!]*$", re.IGNORECASE)
+COUNTRY_RULE = re.compile(r"\b(?:tell me about|information (?:about|on)|info (?:about|on))\s+(?:the country\s+)?(?P<arg>[A-Za-z][A-Za-z .'-]*?)\s*[?.!]*$", re.IGNORECASE)
+RULES = [("EQUATION", EQUATION_RULE, 0.99), ("EQUATION", BARE_EQUATION_RULE, 0.95),
+         ("WEATHER", WEATHER_RULE, 0.95), ("COUNTRY", COUNTRY_RULE, 0.95)]
+
+def classify_locally(query):
+    """Returns (label, confidence) from cosine similarity to the label centroids."""
+    scores = ROUTE_CENTROIDS @ hash_embedding(query, ROUTER_DIM)
+    weights = np.exp((scores - scores.max()) / ROUTER_TEMPERATURE)
+    probabilities = weights / weights.sum()
+    best = int(probabilities.argmax())
+    return ROUTE_LABELS[best], float(probabilities[best])
+
+def route_query(query, threshold=ROUTER_CONFIDENCE):
+    """
+    Routes a query locally when confident. Returns (label, argument, confidence),
+    or None when the query should go to the LLM instead.
+    """
+    clf_label, clf_confidence = classify_locally(query)
+    for label, rule, confidence in RULES:
+        match = rule.search(query.strip())
+        if not match:
+            continue
+        if label == "COUNTRY":
+            # The classifier keys on the same words as this rule, so its agreement proves
+            # nothing; only a known country name makes the match trustworthy.
+            if not is_country(match.group("arg")):
+                return None
+        else:
+            # Rules that the classifier agrees with get more confident, disagreement less.
+            confidence = min(1.0, confidence + 0.2) if clf_label == label else confidence - 0.3
+        if confidence >= threshold:
+            return label, match.group("arg").strip(), confidence
+        return None
+    # No rule matched: only a confident UNKNOWN can be answered without extracting an argument.
+    if clf_label == "UNKNOWN" and clf_confidence >= threshold:
+        return "UNKNOWN", None, clf_confidence
+    return None
+
+def call_tool(decision, argument):
+    """Runs the tool for a routing decision."""
+    if decision == "EQUATION":
+        return solve_equation(argument)
+    if decision == "WEATHER":
+        return get_weather(argument)
+    if decision == "COUNTRY":
+        return get_country_info(argument)
+    return "I can solve equations, fetch weather, or get country info. Please ask accordingly."
 
 # Gemini-based Reasoning Function
-def art_reasoning(query):
+def llm_route(query):
     """Uses Gemini LLM to decide which tool to use based on query."""
     prompt = f"""
     You are an AI assistant that decides the best tool to use based on the user's query.
@@ -62,33 +225,62 @@ def art_reasoning(query):
     """
 
     # Ask Gemini LLM to classify the query
-    response = gemini_model.generate_content(prompt)
+    response = gemini_model().generate_content(prompt)
     decision = response.text.strip().upper()
 
-    # Call the appropriate tool
     if "EQUATION" in decision:
-        equation = query.split("solve")[-1].strip()
-        return solve_equation(equation)
-    
+        return "EQUATION", query.split("solve")[-1].strip()
     elif "WEATHER" in decision:
-        city = query.split("weather in")[-1].strip()
-        return get_weather(city)
-    
+        return "WEATHER", query.split("weather in")[-1].strip()
     elif "COUNTRY" in decision:
-        country = query.split("about")[-1].strip()
-        return get_country_info(country)
-    
+        return "COUNTRY", query.split("about")[-1].strip()
+    return "UNKNOWN", None
+
+def art_reasoning(query, use_router=True):
+    """Routes the query locally when confident, otherwise asks Gemini, then calls the chosen tool."""
+    routed = route_query(query) if use_router else None
+    if routed is not None:
+        decision, argument, _ = routed
     else:
-        return "I can solve equations, fetch weather, or get country info. Please ask accordingly."
+        decision, argument = llm_route(query)
+    return call_tool(decision, argument)
+
+async def art_reasoning_batch(queries, concurrency=16):
+    """
+    Answers many queries together. Routing and tool calls run in worker threads,
+    at most `concurrency` at a time, and identical tool calls in the batch are
+    made only once.
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def limited(func, *args):
+        async with semaphore:
+            return await asyncio.to_thread(func, *args)
+
+    async def decide(query):
+        routed = route_query(query)
+        if routed is not None:
+            return routed[:2]
+        return await limited(llm_route, query)
+
+    decisions = await asyncio.gather(*(decide(query) for query in queries))
+    keys = [(decision, " ".join((argument or "").lower().split())) for decision, argument in decisions]
+    unique_calls = {}
+    for key, (decision, argument) in zip(keys, decisions):
+        if key not in unique_calls:
+            unique_calls[key] = asyncio.ensure_future(limited(call_tool, decision, argument))
+    results = {key: await task for key, task in unique_calls.items()}
+    return [results[key] for key in keys]
 
 # Example Queries
-queries = [
-    "solve x**2 - 4 = 0",
-    "What is the weather in London?",
-    "Tell me about France",
-    "Who is the president of the USA?"  # Will return 'UNKNOWN'
-]
-
-for query in queries:
-    print(f"\nQuery: {query}")
-    print(f"Answer: {art_reasoning(query)}")
+if __name__ == "__main__":
+    queries = [
+        "solve x**2 - 4 = 0",
+        "What is the weather in London?",
+        "Tell me about France",
+        "Who is the president of the USA?"  # Will return 'UNKNOWN'
+    ]
+
+    for query in queries:
+        print(f"\nQuery: {query}")
+        print(f"Answer: {art_reasoning(query)}")
@@ -0,0 +1,105 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import faiss
+import numpy as np
+import rag
+
+# Recall/latency benchmark for the index types supported by rag.build_faiss_index.
+# Vectors are synthetic (clustered Gaussian), so the results are reproducible offline.
+
+def synthetic_vectors(n, d, clusters=256, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, d)).astype("float32")
+    assignments = rng.integers(0, clusters, size=n)
+    vectors = centers[assignments] + 0.3 * rng.normal(size=(n, d)).astype("float32")
+    return vectors.astype("float32")
+
+
+def ivf_params(n):
+    """
+    Sizes IVF/PQ from the vector count so training gets the 39 points per centroid
+    FAISS asks for: nlist ~ 4*sqrt(n), and PQ codebooks shrink below 8 bits for small n.
+    """
+    nlist = max(1, min(int(4 * np.sqrt(n)), n // 39))
+    pq_bits = int(min(8, max(1, np.log2(max(n, 1) / 39))))
+    return nlist, pq_bits
+
+
+def index_memory_bytes(index):
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def recall_at_k(ground_truth, found, k):
+    hits = sum(len(set(gt[:k]) & set(row[:k])) for gt, row in zip(ground_truth, found))
+    return hits / (len(ground_truth) * k)
+
+
+def build_index(vectors, index_type, build_params):
+    start = time.perf_counter()
+    index = rag.build_faiss_index(vectors.shape[1], index_type, **build_params)
+    if not index.is_trained:
+        index.train(vectors[:rag.TRAIN_SAMPLE_SIZE])
+    index.add(vectors)
+    return index, time.perf_counter() - start
+
+
+def run_config(index, build_seconds, queries, ground_truth, k, index_type, build_params, search_params):
+    rag.set_search_params(index, **search_params)
+    start = time.perf_counter()
+    _, found = index.search(queries, k)
+    search_seconds = time.perf_counter() - start
+    return {
+        "index_type": index_type,
+        "build_params": build_params,
+        "search_params": search_params,
+        f"recall@{k}": recall_at_k(ground_truth, found, k),
+        "qps": len(queries) / search_seconds,
+        "build_seconds": build_seconds,
+        "memory_bytes": index_memory_bytes(index),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index types against the flat baseline")
+    parser.add_argument("--vectors", type=int, default=5000)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    args = parser.parse_args()
+
+    vectors = synthetic_vectors(args.vectors, args.dim)
+    queries = synthetic_vectors(args.queries, args.dim, seed=1)
+    baseline = faiss.IndexFlatL2(args.dim)
+    baseline.add(vectors)
+    _, ground_truth = baseline.search(queries, args.k)
+
+    nlist, pq_bits = ivf_params(args.vectors)
+    configs = [("flat", {}, {})]
+    configs += [("ivf", {"nlist": nlist}, {"nprobe": p}) for p in (1, 8, 32, 128) if p <= nlist]
+    configs += [("hnsw", {"m": 32, "ef_construction": 200}, {"ef_search": ef}) for ef in (16, 64, 256)]
+    configs += [("ivfpq", {"nlist": nlist, "pq_m": 64, "pq_bits": pq_bits}, {"nprobe": p})
+                for p in (8, 32, 128) if p <= nlist]
+
+    built = {}  # Each index is built once and reused across its search settings
+    for index_type, build_params, search_params in configs:
+        key = (index_type, json.dumps(build_params, sort_keys=True))
+        if key not in built:
+            built.clear()
+            built[key] = build_index(vectors, index_type, build_params)
+        result = run_config(*built[key], queries, ground_truth, args.k, index_type, build_params, search_params)
+        if args.json:
+            print(json.dumps(result))
+        else:
+            print(f"{index_type:<6} build={build_params} search={search_params} "
+                  f"recall@{args.k}={result[f'recall@{args.k}']:.3f} qps={result['qps']:.0f} "
+                  f"build_s={result['build_seconds']:.1f} memory_mb={result['memory_bytes'] / 1e6:.1f}")
+
+
+if __name__ == "__main__":
+    main()
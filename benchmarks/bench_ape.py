@@ -0,0 +1,40 @@
+import argparse
+import os
+import random
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import ape
+
+# Successive halving vs. the serial exhaustive loop in ape.py, with a simulated
+# evaluation call so the comparison runs offline.
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark APE candidate evaluation strategies")
+    parser.add_argument("--candidates", type=int, default=50)
+    parser.add_argument("--inputs", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.02, help="Simulated seconds per evaluation call")
+    parser.add_argument("--workers", type=int, default=16)
+    parser.add_argument("--eta", type=int, default=2)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    quality = {f"Instruction {i}": rng.random() for i in range(args.candidates)}
+
+    def evaluate(instruction, sample_input):
+        time.sleep(args.latency)
+        noise = random.Random(hash((instruction, sample_input))).random() * 0.2
+        return "x" * int(100 * (quality[instruction] + noise))
+
+    inputs = [f"Sample input {j}" for j in range(args.inputs)]
+    report = ape.compare_strategies(list(quality), inputs, args.workers, args.eta, evaluate)
+    true_best = max(quality, key=quality.get)
+    for name, result in report.items():
+        print(f"{name:<20} calls={result['calls']:<6} seconds={result['seconds']:.2f} "
+              f"best={result['best']!r} (true best {true_best!r})")
+
+
+if __name__ == "__main__":
+    main()
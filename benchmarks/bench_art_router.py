@@ -0,0 +1,70 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import art
+
+# Accuracy/latency trade-off of art's local router against LLM-only routing.
+# The LLM is the fake backend answering with the true label after a simulated delay.
+
+LABELED_QUERIES = [
+    ("solve x**2 - 4 = 0", "EQUATION"), ("solve 3*x + 2 = 11", "EQUATION"), ("x**2 - 9 = 0", "EQUATION"),
+    ("please solve x**3 - 8 = 0", "EQUATION"), ("what value of x makes 2*x = 10", "EQUATION"),
+    ("What is the weather in London?", "WEATHER"), ("weather in Paris", "WEATHER"),
+    ("weather for New York today", "WEATHER"), ("how hot is it in Cairo", "WEATHER"),
+    ("is it raining in Dublin right now", "WEATHER"), ("what's the weather at Sydney?", "WEATHER"),
+    ("Tell me about France", "COUNTRY"), ("tell me about Japan", "COUNTRY"),
+    ("information about Brazil", "COUNTRY"), ("what is the capital of Peru", "COUNTRY"),
+    ("population of Canada", "COUNTRY"), ("info on Kenya", "COUNTRY"),
+    ("Who is the president of the USA?", "UNKNOWN"), ("write a poem about cats", "UNKNOWN"),
+    ("recommend a movie for tonight", "UNKNOWN"), ("how do I learn python", "UNKNOWN"),
+    ("tell me about Einstein", "UNKNOWN"), ("what time is it", "UNKNOWN"),
+    ("Tell me about quantum computing", "UNKNOWN"), ("tell me about yourself", "UNKNOWN"),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark art's local router against LLM routing")
+    parser.add_argument("--llm-latency", type=float, default=0.3, help="Simulated seconds per LLM routing call")
+    parser.add_argument("--repeat", type=int, default=200, help="Local routing repetitions per query")
+    parser.add_argument("--thresholds", default="0.6,0.7,0.8,0.9,0.95")
+    args = parser.parse_args()
+
+    labels = dict(LABELED_QUERIES)
+    model = art.gemini_model().model
+    model.first_token_delay, model.chunk_delay = args.llm_latency, 0.0
+    model.responder = lambda prompt: labels.get(prompt.split('Query: "')[1].split('"')[0], "UNKNOWN")
+
+    local_times = []
+    for query, _ in LABELED_QUERIES:
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            art.route_query(query)
+        local_times.append((time.perf_counter() - start) / args.repeat)
+
+    llm_times = []
+    for query, _ in LABELED_QUERIES[:5]:
+        start = time.perf_counter()
+        art.llm_route(query)
+        llm_times.append(time.perf_counter() - start)
+
+    print(f"local routing latency: mean={statistics.mean(local_times) * 1e6:.0f}us "
+          f"max={max(local_times) * 1e6:.0f}us")
+    print(f"LLM routing latency:   mean={statistics.mean(llm_times) * 1e3:.0f}ms")
+    for threshold in [float(t) for t in args.thresholds.split(",")]:
+        routed = [(art.route_query(query, threshold), label) for query, label in LABELED_QUERIES]
+        local = [(decision, label) for decision, label in routed if decision is not None]
+        correct = sum(decision[0] == label for decision, label in local)
+        coverage = len(local) / len(LABELED_QUERIES)
+        expected_ms = (1 - coverage) * statistics.mean(llm_times) * 1e3
+        print(f"threshold={threshold:.2f} coverage={coverage:.0%} "
+              f"local_accuracy={correct / len(local) if local else 0:.0%} "
+              f"expected_routing_latency={expected_ms:.0f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,48 @@
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rag
+from bench_index_build import synthetic_chunks
+
+# Throughput of rag.retrieve_documents_batch against a per-query retrieve_documents loop,
+# both using the local embedding backend so the comparison runs offline.
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark batched vs per-query retrieval")
+    parser.add_argument("--chunks", type=int, default=50000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--top-k", type=int, default=5)
+    parser.add_argument("--delay", type=float, default=0.0, help="Simulated seconds per embedding request")
+    args = parser.parse_args()
+
+    backend = rag.LocalEmbeddingBackend(dim=args.dim, delay=args.delay)
+    queries = [f"What is known about the bridge number {i * 13 % 1000}?" for i in range(args.queries)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rag.index_path = os.path.join(tmp, "faiss_index")
+        rag.chunk_store_path = os.path.join(tmp, "text_data")
+        rag.create_faiss_index(synthetic_chunks(args.chunks), backend=backend)
+        retriever = rag.RAGRetriever()
+        retriever.get()  # Load once so neither run pays for it
+
+        start = time.perf_counter()
+        for query in queries:
+            rag.retrieve_documents(query, args.top_k, retriever=retriever, backend=backend)
+        loop_seconds = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rag.retrieve_documents_batch(queries, args.top_k, retriever=retriever, backend=backend)
+        batch_seconds = time.perf_counter() - start
+
+    print(f"per-query loop: {args.queries / loop_seconds:.1f} queries/s ({loop_seconds:.2f}s)")
+    print(f"batched:        {args.queries / batch_seconds:.1f} queries/s ({batch_seconds:.2f}s)")
+    print(f"speedup:        {loop_seconds / batch_seconds:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import argparse
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rag
+
+# Offline index build benchmark: embeds synthetic chunks with the local backend
+# and reports chunks per second for different batch sizes and worker counts.
+
+def synthetic_chunks(n):
+    topics = ["ocean", "desert", "mountain", "telescope", "bridge", "forest", "tower", "satellite"]
+    for i in range(n):
+        topic = topics[i % len(topics)]
+        yield f"Document {i} describes the {topic} number {i * 7 % 1000} and its history in year {1800 + i % 200}."
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark FAISS index builds offline")
+    parser.add_argument("--chunks", type=int, default=1000)
+    parser.add_argument("--dim", type=int, default=768)
+    parser.add_argument("--delay", type=float, default=0.02, help="Simulated seconds per embedding request")
+    parser.add_argument("--batch-sizes", default="1,32,100")
+    parser.add_argument("--workers", default="1,4,8")
+    args = parser.parse_args()
+
+    backend = rag.LocalEmbeddingBackend(dim=args.dim, delay=args.delay)
+    with tempfile.TemporaryDirectory() as tmp:
+        rag.index_path = os.path.join(tmp, "faiss_index")
+        rag.chunk_store_path = os.path.join(tmp, "text_data")
+        for batch_size in [int(b) for b in args.batch_sizes.split(",")]:
+            for workers in [int(w) for w in args.workers.split(",")]:
+                stats = rag.create_faiss_index(synthetic_chunks(args.chunks), backend=backend,
+                                               batch_size=batch_size, max_workers=workers)
+                print(f"batch_size={batch_size:<4} workers={workers:<3} "
+                      f"chunks={stats['chunks']} seconds={stats['seconds']:.2f} "
+                      f"chunks/s={stats['chunks_per_second']:.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import argparse
+import multiprocessing
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+
+# Concurrent load test for ResearchAgent's cache and single-flight layer.
+# Several processes, each with a pool of threads, search a small set of topics
+# (with varied case and spacing) at the same time against one database and a
+# slow fake model. Every model call beyond one per topic is a duplicate.
+# "legacy" runs the previous lookup-then-call logic for comparison.
+
+TOPICS = ["Impact of AI in healthcare", "Quantum computing in finance", "Battery recycling economics",
+          "Remote work and productivity", "CRISPR in agriculture"]
+
+
+def variant(topic, rng):
+    return rng.choice([topic, topic.lower(), topic.upper(), "  " + topic + "?", topic.replace(" ", "  ")])
+
+
+def legacy_search(db_file, model, topic):
+    conn = sqlite3.connect(db_file, timeout=30)
+    try:
+        result = conn.execute("SELECT response FROM research WHERE query=?", (topic,)).fetchone()
+        if result:
+            return result[0]
+        answer = model.generate_content(f"Conduct an in-depth research summary on: {topic}").text.strip()
+        conn.execute("INSERT INTO research (query, response) VALUES (?, ?)", (topic, answer))
+        conn.commit()
+        return answer
+    finally:
+        conn.close()
+
+
+def worker(mode, db_file, threads, requests, model_latency, seed, barrier):
+    from llm_client import FakeBackend, LLMClient, set_client
+    client = set_client(LLMClient(FakeBackend(first_token_delay=model_latency, chunk_delay=0),
+                                  requests_per_minute=10 ** 9, max_concurrency=threads))
+    rng = random.Random(seed)
+    queries = [variant(rng.choice(TOPICS), rng) for _ in range(requests)]
+    if mode == "legacy":
+        model = client.model("gemini-2.0-flash")
+        search = lambda topic: legacy_search(db_file, model, topic)
+    else:
+        from agents.research_assistant import ResearchAgent
+        agent = ResearchAgent(db_file=db_file)
+        search = agent.search
+    barrier.wait()  # Start all processes together so their first searches collide
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(search, queries))
+    return client.calls
+
+
+def run(mode, args):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "research.db")
+        if mode == "legacy":
+            with sqlite3.connect(db_file) as conn:
+                conn.execute("CREATE TABLE IF NOT EXISTS research (query TEXT, response TEXT)")
+        context = multiprocessing.get_context("spawn")
+        with context.Manager() as manager:
+            barrier = manager.Barrier(args.processes)
+            with context.Pool(args.processes) as pool:
+                start = time.perf_counter()
+                calls = pool.starmap(worker, [(mode, db_file, args.threads, args.requests, args.model_latency,
+                                               seed, barrier) for seed in range(args.processes)])
+                elapsed = time.perf_counter() - start
+    total = sum(calls)
+    requests = args.processes * args.requests
+    print(f"{mode:<12} requests={requests} model_calls={total} duplicate_calls={total - len(TOPICS)} "
+          f"elapsed={elapsed:.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test ResearchAgent single-flight caching")
+    parser.add_argument("--processes", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=200, help="Searches per process")
+    parser.add_argument("--model-latency", type=float, default=0.5)
+    args = parser.parse_args()
+    run("legacy", args)
+    run("singleflight", args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import rag
+from fake_llm import FakeGenerativeModel
+
+# Time-to-first-token and total latency of the streaming and async RAG paths,
+# measured against a fake model that streams canned chunks.
+
+DOCUMENTS = [
+    "The Golden Gate Bridge, completed in 1937, spans 1.7 miles across the San Francisco Bay.",
+    "The Eiffel Tower, constructed in 1889, stands at 330 meters tall.",
+    "The Hubble Space Telescope, launched in 1990, has provided breathtaking images of the universe.",
+]
+
+
+def summarize(name, samples, key):
+    values = sorted(m[key] for m in samples)
+    p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+    print(f"{name:<10} {key:<20} p50={statistics.median(values) * 1000:.1f}ms p95={p95 * 1000:.1f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark streaming and async RAG generation")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--first-token-delay", type=float, default=0.3)
+    parser.add_argument("--chunk-delay", type=float, default=0.05)
+    args = parser.parse_args()
+
+    backend = rag.LocalEmbeddingBackend()
+    model = FakeGenerativeModel(first_token_delay=args.first_token_delay, chunk_delay=args.chunk_delay)
+    queries = [f"What happened in {1889 + i % 100}?" for i in range(args.requests)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rag.index_path = os.path.join(tmp, "faiss_index")
+        rag.chunk_store_path = os.path.join(tmp, "text_data")
+        rag.create_faiss_index(DOCUMENTS, backend=backend)
+        retriever = rag.RAGRetriever()
+
+        stream_metrics = []
+        for query in queries[:10]:
+            metrics = {}
+            for _ in rag.generate_response_stream(query, model, metrics, retriever=retriever, backend=backend):
+                pass
+            stream_metrics.append(metrics)
+        summarize("stream", stream_metrics, "time_to_first_token")
+        summarize("stream", stream_metrics, "total_latency")
+
+        start = time.perf_counter()
+        results = asyncio.run(rag.generate_responses_async(queries, model, args.concurrency,
+                                                           retriever=retriever, backend=backend))
+        elapsed = time.perf_counter() - start
+        async_metrics = [metrics for _, metrics in results]
+        summarize("async", async_metrics, "time_to_first_token")
+        summarize("async", async_metrics, "total_latency")
+        print(f"async throughput: {len(queries) / elapsed:.1f} requests/s at concurrency {args.concurrency}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+import argparse
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from agents.customer_support import LongTermMemory
+
+# Per-turn storage latency of customer_support.LongTermMemory at millions of rows.
+# A turn is what CustomerSupportAgent.respond does against the database: read the
+# user's recent history, then store the new exchange. "legacy" replays the old
+# access pattern (one shared connection, no index on user_id, commit per insert).
+
+
+def populate(db_file, rows, users, indexed):
+    conn = sqlite3.connect(db_file)
+    conn.execute("CREATE TABLE IF NOT EXISTS conversation (user_id TEXT, query TEXT, response TEXT)")
+    rng = random.Random(0)
+    with conn:
+        conn.executemany("INSERT INTO conversation (user_id, query, response) VALUES (?, ?, ?)",
+                         ((f"user{rng.randrange(users)}", f"question {i}", f"answer {i}") for i in range(rows)))
+    if indexed:
+        conn.execute("CREATE INDEX IF NOT EXISTS idx_conversation_user ON conversation(user_id)")
+    conn.close()
+
+
+class LegacyMemory:
+    """The previous LongTermMemory conversation path."""
+    def __init__(self, db_file):
+        self.conn = sqlite3.connect(db_file, check_same_thread=False)  # Driven from one benchmark thread
+        self.cursor = self.conn.cursor()
+
+    def store_conversation(self, user_id, query, response):
+        self.cursor.execute("INSERT INTO conversation (user_id, query, response) VALUES (?, ?, ?)",
+                            (user_id, query, response))
+        self.conn.commit()
+
+    def get_recent_conversations(self, user_id, limit=3):
+        self.cursor.execute("SELECT query, response FROM conversation WHERE user_id=? ORDER BY rowid DESC LIMIT ?",
+                            (user_id, limit))
+        return self.cursor.fetchall()
+
+
+def run_turns(memory, turns, users, threads, seed=1):
+    latencies = []
+    lock = threading.Lock()
+
+    def worker(worker_id):
+        rng = random.Random(seed + worker_id)
+        local = []
+        for i in range(turns // threads):
+            user_id = f"user{rng.randrange(users)}"
+            start = time.perf_counter()
+            memory.get_recent_conversations(user_id)
+            memory.store_conversation(user_id, f"new question {i}", f"new answer {i}")
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    start = time.perf_counter()
+    workers = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return latencies, time.perf_counter() - start
+
+
+def report(name, rows, threads, latencies, elapsed):
+    values = sorted(latencies)
+    p95 = values[min(len(values) - 1, int(0.95 * len(values)))]
+    print(f"{name:<8} rows={rows:<9} threads={threads:<3} p50={statistics.median(values) * 1000:.2f}ms "
+          f"p95={p95 * 1000:.2f}ms turns/s={len(values) / elapsed:.0f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark customer support conversation storage")
+    parser.add_argument("--rows", type=int, nargs="+", default=[100000, 1000000, 3000000])
+    parser.add_argument("--users", type=int, default=50000)
+    parser.add_argument("--turns", type=int, default=2000)
+    parser.add_argument("--legacy-turns", type=int, default=100, help="The unindexed path scans the table per turn")
+    parser.add_argument("--threads", type=int, default=8)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in args.rows:
+            legacy_db = os.path.join(tmp, f"legacy_{rows}.db")
+            populate(legacy_db, rows, args.users, indexed=False)
+            legacy = LegacyMemory(legacy_db)
+            report("legacy", rows, 1, *run_turns(legacy, args.legacy_turns, args.users, 1))
+            legacy.conn.close()
+
+            db_file = os.path.join(tmp, f"memory_{rows}.db")
+            populate(db_file, rows, args.users, indexed=True)
+            memory = LongTermMemory(db_file)
+            report("wal", rows, 1, *run_turns(memory, args.turns, args.users, 1))
+            report("wal", rows, args.threads, *run_turns(memory, args.turns, args.users, args.threads))
+            memory.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+from llm_client import FakeBackend, LLMClient, set_client
+
+# Load test for agents/support_server.py against the local fake model.
+# Simulated users send turns with think time in between; the report covers
+# throughput, turn latency, rejected (busy) turns and session cache behaviour.
+# With --tcp the turns go through the JSON-lines front end instead of handle().
+
+
+def percentile(values, fraction):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+async def drive(send, users, turns, think_time, seed=0):
+    rng = random.Random(seed)
+    latencies, rejected = [], 0
+
+    async def user(user_id):
+        nonlocal rejected
+        for turn in range(turns):
+            await asyncio.sleep(rng.uniform(0, think_time))
+            start = time.perf_counter()
+            ok = await send(f"user{user_id}", f"Question {turn}: is the laptop on offer?")
+            if ok:
+                latencies.append(time.perf_counter() - start)
+            else:
+                rejected += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(user(i) for i in range(users)))
+    return latencies, rejected, time.perf_counter() - start
+
+
+async def run(args, db_file):
+    from agents.support_server import ServerBusy, SupportServer
+    from agents.customer_support import CustomerSupportAgent
+    server = SupportServer(CustomerSupportAgent(db_file=db_file), max_concurrency=args.max_concurrency,
+                           max_pending=args.max_pending, max_sessions=args.max_sessions)
+    server.agent.update_training("product", "Gaming laptop, $1499")
+    server.agent.update_offer("offer", "10% off laptops this week", 10)
+
+    if args.tcp:
+        tcp_server = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = tcp_server.sockets[0].getsockname()[1]
+        connections = [await asyncio.open_connection("127.0.0.1", port) for _ in range(args.connections)]
+        waiters, counter = {}, iter(range(10 ** 9))
+
+        async def read_replies(reader):
+            while line := await reader.readline():
+                reply = json.loads(line)
+                waiters.pop(reply["id"]).set_result(reply)
+
+        readers = [asyncio.create_task(read_replies(reader)) for reader, _ in connections]
+
+        async def send(user_id, query):
+            request_id = next(counter)
+            waiters[request_id] = asyncio.get_running_loop().create_future()
+            _, writer = connections[hash(user_id) % len(connections)]
+            writer.write((json.dumps({"id": request_id, "user_id": user_id, "query": query}) + "\n").encode())
+            return "answer" in await waiters[request_id]
+    else:
+        async def send(user_id, query):
+            try:
+                await server.handle(user_id, query)
+                return True
+            except ServerBusy:
+                return False
+
+    latencies, rejected, elapsed = await drive(send, args.users, args.turns, args.think_time)
+    if args.tcp:
+        for _, writer in connections:
+            writer.close()
+            await writer.wait_closed()
+        await asyncio.gather(*readers)
+        await asyncio.sleep(0.05)  # Let the server's connection handlers see EOF
+        tcp_server.close()
+        await tcp_server.wait_closed()
+    server.close()
+
+    print(f"users={args.users} turns={len(latencies)} rejected={rejected} elapsed={elapsed:.2f}s "
+          f"throughput={len(latencies) / elapsed:.1f} turns/s")
+    print(f"latency p50={statistics.median(latencies) * 1000:.0f}ms p95={percentile(latencies, 0.95) * 1000:.0f}ms "
+          f"p99={percentile(latencies, 0.99) * 1000:.0f}ms")
+    print(f"server stats: {server.stats}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the customer support session server")
+    parser.add_argument("--users", type=int, default=300)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--think-time", type=float, default=2.0, help="Max seconds between a user's turns")
+    parser.add_argument("--model-latency", type=float, default=0.2)
+    parser.add_argument("--max-concurrency", type=int, default=64)
+    parser.add_argument("--max-pending", type=int, default=1024)
+    parser.add_argument("--max-sessions", type=int, default=1000)
+    parser.add_argument("--tcp", action="store_true", help="Go through the JSON-lines front end")
+    parser.add_argument("--connections", type=int, default=8)
+    args = parser.parse_args()
+
+    set_client(LLMClient(FakeBackend(first_token_delay=args.model_latency, chunk_delay=0,
+                                     responder=lambda prompt: "Check the offer.\nYes, 10% off applies."),
+                         requests_per_minute=10 ** 9, max_concurrency=args.max_concurrency))
+    with tempfile.TemporaryDirectory() as tmp:
+        asyncio.run(run(args, os.path.join(tmp, "support.db")))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,394 @@
+import argparse
+import base64
+import contextlib
+import hashlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.append(ROOT)
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+import llm_client
+from fake_llm import FakeResponse
+from llm_cache import ResponseCache, set_response_cache
+
+# Record/replay benchmark harness for every prompting technique in the repo.
+#
+# In "record" mode the pipelines run against live Gemini, live HTTP and live
+# Google search, and every model, embedding, HTTP and search response is saved
+# to a JSON cassette. In "replay" mode the same pipelines run offline against
+# the cassette with a configurable simulated latency, and the harness reports
+# latency percentiles, throughput, LLM call counts and peak Python memory per
+# technique as JSON that can be diffed across commits.
+
+DEFAULT_CASSETTE = os.path.join(ROOT, "benchmarks", "cassettes", "default.json")
+
+
+class CassetteMiss(KeyError):
+    pass
+
+
+class Cassette:
+    """Recorded responses keyed by (kind, request) digest, plus the recorded latency."""
+    def __init__(self, path, mode="replay", latency="recorded", allow_missing=False):
+        self.path = path
+        self.mode = mode
+        self.latency = latency  # "recorded" or a fixed number of seconds per call
+        self.allow_missing = allow_missing  # Replay synthetic responses for unrecorded requests
+        self.entries = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            with open(path, "r") as f:
+                self.entries = json.load(f)
+        elif mode == "replay" and not allow_missing:
+            raise FileNotFoundError(f"No cassette at {path}; run with --mode record first.")
+
+    @staticmethod
+    def key(kind, request):
+        payload = json.dumps(request, sort_keys=True, default=str)
+        return kind + ":" + hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def call(self, kind, request, live, synthetic):
+        """Records `live()` in record mode; returns the stored (or synthetic) value in replay mode."""
+        key = self.key(kind, request)
+        if self.mode == "record":
+            start = time.perf_counter()
+            value = live()
+            with self._lock:
+                self.entries[key] = {"value": value, "latency": time.perf_counter() - start}
+            return value
+
+        entry = self.entries.get(key)
+        if entry is None:
+            if not self.allow_missing:
+                raise CassetteMiss(f"{kind} request not in cassette: {json.dumps(request, default=str)[:200]}")
+            entry = {"value": synthetic(), "latency": 0.0}
+        delay = entry["latency"] if self.latency == "recorded" else float(self.latency)
+        if delay:
+            time.sleep(delay)
+        return entry["value"]
+
+    def save(self):
+        if self.mode != "record":
+            return
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(self.path, "w") as f:
+            json.dump(self.entries, f)
+
+
+# -------------------------------
+# Model replay (plugs into llm_client as a backend)
+# -------------------------------
+class ReplayModel:
+    def __init__(self, model_name, cassette, live_model=None):
+        self.model_name = model_name
+        self.cassette = cassette
+        self.live_model = live_model
+
+    def _text(self, prompt):
+        def live():
+            return self.live_model.generate_content(prompt).text
+        return self.cassette.call("llm", {"model": self.model_name, "prompt": str(prompt)}, live,
+                                  lambda: "Synthetic answer 5")
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        text = self._text(prompt)
+        return iter([FakeResponse(text)]) if stream else FakeResponse(text)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        import asyncio
+        text = await asyncio.to_thread(self._text, prompt)
+
+        async def chunks():
+            yield FakeResponse(text)
+        return chunks() if stream else FakeResponse(text)
+
+
+class ReplayBackend:
+    name = "replay"
+
+    def __init__(self, cassette):
+        self.cassette = cassette
+        self.live = llm_client.GeminiBackend() if cassette.mode == "record" else None
+
+    def create_model(self, model_name):
+        live_model = self.live.create_model(model_name) if self.live else None
+        return ReplayModel(model_name, self.cassette, live_model)
+
+    def request_kwargs(self, timeout):
+        return {}
+
+
+# -------------------------------
+# HTTP, search and embedding replay
+# -------------------------------
+@contextlib.contextmanager
+def patched_http(cassette):
+    """Routes every requests.Session.request through the cassette."""
+    original = requests.Session.request
+
+    def request(session, method, url, **kwargs):
+        params = kwargs.get("params")
+
+        def live():
+            response = original(session, method, url, **kwargs)
+            return {"status": response.status_code, "headers": dict(response.headers),
+                    "body": base64.b64encode(response.content).decode("ascii")}
+
+        value = cassette.call("http", {"method": method, "url": url, "params": params}, live,
+                              lambda: {"status": 404, "headers": {}, "body": ""})
+        response = requests.Response()
+        response.status_code = value["status"]
+        response.headers = CaseInsensitiveDict(value["headers"])
+        response._content = base64.b64decode(value["body"])
+        response._content_consumed = True
+        response.url = url
+        response.encoding = get_encoding_from_headers(response.headers)
+        return response
+
+    requests.Session.request = request
+    try:
+        yield
+    finally:
+        requests.Session.request = original
+
+
+def replay_embeddings(cassette, rag):
+    """Routes rag's genai.embed_content calls through the cassette."""
+    original = rag.genai.embed_content
+
+    def embed_content(model, content, task_type=None, **kwargs):
+        def live():
+            return original(model, content, task_type=task_type, **kwargs)["embedding"]
+
+        def synthetic():
+            from text_vectors import hash_embeddings
+            texts = content if isinstance(content, list) else [content]
+            vectors = hash_embeddings(texts).tolist()
+            return vectors if isinstance(content, list) else vectors[0]
+        return {"embedding": cassette.call("embed", {"model": model, "content": content, "task_type": task_type},
+                                           live, synthetic)}
+
+    rag.genai.embed_content = embed_content
+    return lambda: setattr(rag.genai, "embed_content", original)
+
+
+# -------------------------------
+# Technique pipelines
+# -------------------------------
+# Each entry returns (setup, run, restore): setup() runs once before timing, run(i) is one
+# timed request, and restore() undoes any patching. setup and restore may be None.
+
+RAG_DOCUMENTS = [
+    "The Eiffel Tower, constructed in 1889, stands at 330 meters tall and attracts millions of visitors annually.",
+    "Albert Einstein developed the theory of relativity in 1905, which changed modern physics.",
+    "The Moon Landing on July 20, 1969, saw Neil Armstrong become the first human to walk on the moon.",
+    "The Golden Gate Bridge, completed in 1937, spans 1.7 miles across the San Francisco Bay.",
+]
+RAG_QUERIES = ["What happened in 1937?", "Who developed relativity?", "How tall is the Eiffel Tower?"]
+
+
+def pipeline_rag(cassette):
+    import rag
+    restore = replay_embeddings(cassette, rag)
+    rag.embedding_cache = rag.EmbeddingCache(directory=None)
+    rag.default_embedding_backend = rag.CachedEmbeddingBackend(rag.GoogleEmbeddingBackend(), rag.embedding_cache)
+
+    def setup():
+        rag.create_faiss_index(RAG_DOCUMENTS)
+
+    def run(i):
+        return rag.generate_response(RAG_QUERIES[i % len(RAG_QUERIES)])
+    return setup, run, restore
+
+
+def pipeline_ape(cassette):
+    import ape
+    task = "Summarize a paragraph in one sentence."
+    inputs = [
+        "Pretrained language models learn factual knowledge that can be probed with cloze-style prompts.",
+        "AutoPrompt creates prompts automatically using a gradient-guided search over trigger tokens.",
+    ]
+    return None, lambda i: ape.select_best_instruction(task, inputs), None
+
+
+def pipeline_art(cassette):
+    import art
+    queries = ["solve x**2 - 4 = 0", "What is the weather in London?", "Tell me about France",
+               "Who is the president of the USA?"]
+    return None, lambda i: art.art_reasoning(queries[i % len(queries)]), None
+
+
+def pipeline_react(cassette):
+    import ReAct
+    original = ReAct.search
+
+    def search(query, num_results=5):
+        return cassette.call("search", {"query": query, "num_results": num_results},
+                             lambda: list(original(query, num_results=num_results)),
+                             lambda: [f"https://example.com/{i}" for i in range(num_results)])
+    ReAct.search = search
+
+    def restore():
+        ReAct.search = original
+    return None, lambda i: ReAct.google_search_with_content("NVDA stock market sentiment"), restore
+
+
+def pipeline_reflection(cassette):
+    import ReflectionAgent
+    agent = ReflectionAgent.ReflexionAgent()
+    observation = "The user needs help with debugging a Python script. IndexError: list index out of range"
+    return None, lambda i: agent.run(observation), None
+
+
+def pipeline_agents(cassette):
+    from agents.booking import BookingAgent
+    from agents.customer_support import CustomerSupportAgent
+    from agents.ecommerce_assistant import ECommerceAgent
+    from agents.recommendation_agent import RecommendationAgent
+    from agents.reporting import ReportingAgent
+    from agents.research_assistant import ResearchAgent
+    agents = {}
+
+    def setup():
+        agents["booking"] = BookingAgent()
+        agents["ecommerce"] = ECommerceAgent()
+        agents["recommendation"] = RecommendationAgent()
+        agents["reporting"] = ReportingAgent()
+        agents["research"] = ResearchAgent()
+        agents["support"] = CustomerSupportAgent()
+
+    def run(i):
+        agents["booking"].book("Flight from New York to London on April 10")
+        agents["ecommerce"].handle_order("I need a new laptop for gaming.")
+        agents["recommendation"].recommend("Tech gadgets, AI books, productivity tools")
+        agents["reporting"].generate_report("Market trends in renewable energy")
+        agents["research"].search("Impact of AI in healthcare")
+        agents["support"].respond("user-1", "Is there a discount on headphones?")
+    return setup, run, None
+
+
+PIPELINES = {
+    "rag": pipeline_rag,
+    "ape": pipeline_ape,
+    "art": pipeline_art,
+    "react": pipeline_react,
+    "reflection": pipeline_reflection,
+    "agents": pipeline_agents,
+}
+
+
+# -------------------------------
+# Runner
+# -------------------------------
+def percentile(values, q):
+    values = sorted(values)
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def run_technique(name, cassette, iterations):
+    """Runs one technique in a fresh working directory and returns its metrics."""
+    client = llm_client.set_client(llm_client.LLMClient(backend=ReplayBackend(cassette),
+                                                        requests_per_minute=10 ** 9))
+    set_response_cache(ResponseCache())
+    try:
+        setup, run, restore = PIPELINES[name](cassette)
+    except ImportError as e:
+        return {"technique": name, "skipped": f"missing dependency: {e}"}
+    except Exception as e:  # e.g. a module that fails at import time without its API key or data files
+        return {"technique": name, "skipped": f"setup failed: {type(e).__name__}: {e}"}
+
+    latencies = []
+    error = None
+    tracemalloc.start()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            if setup:
+                setup()
+            calls_before = client.calls
+            tracemalloc.reset_peak()
+            start = time.perf_counter()
+            for i in range(iterations):
+                t0 = time.perf_counter()
+                run(i)
+                latencies.append(time.perf_counter() - t0)
+            total = time.perf_counter() - start
+    except CassetteMiss as e:
+        error = str(e)
+    finally:
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+        if restore:
+            restore()
+
+    if error:
+        return {"technique": name, "error": error}
+    return {
+        "technique": name,
+        "iterations": iterations,
+        "latency_p50": percentile(latencies, 0.50),
+        "latency_p90": percentile(latencies, 0.90),
+        "latency_p99": percentile(latencies, 0.99),
+        "throughput": iterations / total if total else None,
+        "llm_calls": client.calls - calls_before,
+        "llm_calls_per_iteration": (client.calls - calls_before) / iterations,
+        "peak_memory_bytes": peak,
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "HEAD"], cwd=ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Record/replay benchmark for every prompting technique")
+    parser.add_argument("--mode", choices=["record", "replay"], default="replay")
+    parser.add_argument("--cassette", default=DEFAULT_CASSETTE)
+    parser.add_argument("--techniques", default=",".join(PIPELINES))
+    parser.add_argument("--iterations", type=int, default=20)
+    parser.add_argument("--latency", default="recorded",
+                        help="Simulated seconds per replayed call, or 'recorded' to reuse recorded latencies")
+    parser.add_argument("--allow-missing", action="store_true",
+                        help="Answer unrecorded requests with synthetic responses instead of failing")
+    parser.add_argument("--output", help="Write the JSON report to this file instead of stdout")
+    args = parser.parse_args()
+
+    cassette = Cassette(os.path.abspath(args.cassette), args.mode, args.latency, args.allow_missing)
+    results = []
+    cwd = os.getcwd()
+    with patched_http(cassette), tempfile.TemporaryDirectory() as workdir:
+        # Agents write their databases and JSON files into the working directory.
+        os.chdir(workdir)
+        try:
+            for name in args.techniques.split(","):
+                results.append(run_technique(name, cassette, args.iterations))
+        finally:
+            os.chdir(cwd)
+    cassette.save()
+
+    report = {"commit": git_commit(), "mode": args.mode, "latency": args.latency,
+              "iterations": args.iterations, "results": results}
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
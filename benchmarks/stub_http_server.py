@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote
+
+# Local stand-in for wttr.in and restcountries.com with a configurable delay.
+# Point art.py at it with ART_WEATHER_URL / ART_COUNTRY_URL, or run this file to
+# compare serial, uncached tool calls with art's pooled, cached batch mode.
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.2
+    requests_served = 0
+
+    def do_GET(self):
+        time.sleep(self.delay)
+        type(self).requests_served += 1
+        parts = self.path.split("?")[0].strip("/").split("/")
+        if len(parts) == 2 and parts[0] == "weather":
+            body, content_type = f"Partly cloudy +{len(parts[1]) + 10}°C".encode("utf-8"), "text/plain"
+        elif len(parts) == 2 and parts[0] == "country":
+            name = unquote(parts[1]).title()
+            body = json.dumps([{"name": {"common": name}, "capital": [f"{name} City"],
+                                "population": 1000000, "currencies": {"XYZ": {}}}]).encode("utf-8")
+            content_type = "application/json"
+        else:
+            self.send_response(404)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(port=0, delay=0.2):
+    """Starts the stub server in a background thread; returns (server, base_url)."""
+    StubHandler.delay = delay
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark art's HTTP tools against a local stub server")
+    parser.add_argument("--delay", type=float, default=0.2, help="Stub server response delay in seconds")
+    parser.add_argument("--queries", type=int, default=40)
+    args = parser.parse_args()
+
+    server, base_url = start_stub_server(delay=args.delay)
+    os.environ["ART_WEATHER_URL"] = base_url + "/weather/{city}"
+    os.environ["ART_COUNTRY_URL"] = base_url + "/country/{country}"
+    os.environ.setdefault("LLM_BACKEND", "fake")
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import art
+    import requests
+
+    # Singapore and Monaco are both a city and a country, so each tool is asked about the
+    # same name; a tool cache that mixes the two up shows up as a wrong-tool answer below.
+    cities = ["London", "Paris", "Tokyo", "Singapore", "Monaco"]
+    countries = ["France", "Japan", "Singapore", "Monaco"]
+    queries = [f"What is the weather in {cities[i % len(cities)]}" if i % 2 else
+               f"Tell me about {countries[i % len(countries)]}" for i in range(args.queries)]
+
+    # Baseline: what the tools did before (new connection per call, no cache, one at a time)
+    start = time.perf_counter()
+    for query in queries:
+        route = art.route_query(query)
+        url = (art.WEATHER_URL.format(city=route[1]) if route[0] == "WEATHER"
+               else art.COUNTRY_URL.format(country=route[1]))
+        requests.get(url)
+    serial_seconds = time.perf_counter() - start
+
+    served_before = StubHandler.requests_served
+    start = time.perf_counter()
+    answers = asyncio.run(art.art_reasoning_batch(queries))
+    batch_seconds = time.perf_counter() - start
+    answers += asyncio.run(art.art_reasoning_batch(queries))  # Warm pass, served from the tool cache
+    wrong_tool = [(query, answer) for query, answer in zip(queries * 2, answers)
+                  if not answer.startswith("Weather" if "weather" in query else "Country")]
+
+    print(f"serial uncached: {serial_seconds:.2f}s for {len(queries)} queries")
+    print(f"batched cached:  {batch_seconds:.2f}s, {StubHandler.requests_served - served_before} upstream requests")
+    print(f"tool cache: {art.tool_cache.stats()}")
+    server.shutdown()
+    if wrong_tool:
+        sys.exit(f"{len(wrong_tool)} answers came from the wrong tool, e.g. {wrong_tool[0]}")
+
+
+if __name__ == "__main__":
+    main()
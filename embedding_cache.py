@@ -0,0 +1,216 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+import numpy as np
+
+# Content-addressed embedding cache.
+# Keys are a SHA-256 digest of (model name, task type, text). Hot entries live in
+# an in-process LRU; every entry is also appended to an on-disk tier made of a
+# float32 array file plus a parallel file of 32-byte keys, one pair per dimension.
+
+KEY_SIZE = 32
+
+
+def embedding_key(model_name, task_type, text):
+    """Returns the cache key for one embedding request."""
+    h = hashlib.sha256()
+    for part in (model_name, task_type, text):
+        data = part.encode("utf-8")
+        h.update(len(data).to_bytes(8, "little"))
+        h.update(data)
+    return h.digest()
+
+
+class _DiskTier:
+    """Append-only float32 vectors with a key index; rewritten only on eviction."""
+    def __init__(self, directory, dim):
+        self.dim = dim
+        self.row_bytes = dim * 4
+        self.vectors_path = os.path.join(directory, f"embeddings_{dim}.f32")
+        self.keys_path = os.path.join(directory, f"embeddings_{dim}.keys")
+        self.rows = {}  # key -> row number
+        self._load()
+        self.vectors_file = open(self.vectors_path, "a+b")
+        self.keys_file = open(self.keys_path, "ab")
+
+    def _load(self):
+        if not (os.path.exists(self.vectors_path) and os.path.exists(self.keys_path)):
+            return
+        with open(self.keys_path, "rb") as f:
+            keys = f.read()
+        # Only trust rows that were fully written to both files.
+        num_rows = min(len(keys) // KEY_SIZE, os.path.getsize(self.vectors_path) // self.row_bytes)
+        for row in range(num_rows):
+            self.rows[keys[row * KEY_SIZE:(row + 1) * KEY_SIZE]] = row
+        self._truncate(num_rows)
+
+    def _truncate(self, num_rows):
+        with open(self.keys_path, "r+b") as f:
+            f.truncate(num_rows * KEY_SIZE)
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(num_rows * self.row_bytes)
+
+    @property
+    def size_bytes(self):
+        return len(self.rows) * (self.row_bytes + KEY_SIZE)
+
+    def get(self, key):
+        row = self.rows.get(key)
+        if row is None:
+            return None
+        self.vectors_file.seek(row * self.row_bytes)
+        return np.frombuffer(self.vectors_file.read(self.row_bytes), dtype="float32")
+
+    def put(self, key, vector):
+        if key in self.rows:
+            return
+        self.vectors_file.seek(0, os.SEEK_END)
+        self.vectors_file.write(np.asarray(vector, dtype="float32").tobytes())
+        self.keys_file.write(key)
+        self.rows[key] = len(self.rows)
+
+    def flush(self):
+        self.vectors_file.flush()
+        self.keys_file.flush()
+
+    def rewrite(self, keep_keys):
+        """Rewrites both files with only `keep_keys`, in the given order."""
+        kept = [(key, self.get(key)) for key in keep_keys if key in self.rows]
+        self.vectors_file.close()
+        self.keys_file.close()
+        with open(self.vectors_path + ".tmp", "wb") as vf, open(self.keys_path + ".tmp", "wb") as kf:
+            for key, vector in kept:
+                vf.write(vector.tobytes())
+                kf.write(key)
+        os.replace(self.vectors_path + ".tmp", self.vectors_path)
+        os.replace(self.keys_path + ".tmp", self.keys_path)
+        self.rows = {key: row for row, (key, _) in enumerate(kept)}
+        self.vectors_file = open(self.vectors_path, "a+b")
+        self.keys_file = open(self.keys_path, "ab")
+
+    def close(self):
+        self.vectors_file.close()
+        self.keys_file.close()
+
+
+class EmbeddingCache:
+    """
+    Two-tier (memory LRU + disk) embedding cache with hit/miss counters. The disk
+    tier is opened on first use, so creating one (e.g. at import) touches no files.
+    """
+    def __init__(self, directory=".embedding_cache", max_memory_entries=10000,
+                 max_disk_bytes=1 << 30):
+        self.directory = directory
+        self.max_memory_entries = max_memory_entries
+        self.max_disk_bytes = max_disk_bytes
+        self._memory = OrderedDict()
+        self._disk = {}  # dim -> _DiskTier
+        self._recency = OrderedDict()  # key -> dim, least recently used first
+        self._lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._opened = not directory
+
+    def _open(self):
+        """Loads the disk tier; called with the lock held."""
+        if self._opened:
+            return
+        self._opened = True
+        os.makedirs(self.directory, exist_ok=True)
+        for name in sorted(os.listdir(self.directory)):
+            if name.startswith("embeddings_") and name.endswith(".f32"):
+                dim = int(name[len("embeddings_"):-len(".f32")])
+                tier = _DiskTier(self.directory, dim)
+                self._disk[dim] = tier
+                for key in tier.rows:
+                    self._recency[key] = dim
+
+    def get(self, model_name, task_type, text):
+        """Returns the cached vector, or None on a miss."""
+        key = embedding_key(model_name, task_type, text)
+        with self._lock:
+            self._open()
+            vector = self._memory.get(key)
+            if vector is not None:
+                self._memory.move_to_end(key)
+                self._touch(key)
+                self.memory_hits += 1
+                return vector
+            dim = self._recency.get(key)
+            if dim is not None:
+                vector = self._disk[dim].get(key)
+                if vector is not None:
+                    self._remember(key, vector)
+                    self._touch(key)
+                    self.disk_hits += 1
+                    return vector
+            self.misses += 1
+            return None
+
+    def put(self, model_name, task_type, text, vector):
+        key = embedding_key(model_name, task_type, text)
+        vector = np.asarray(vector, dtype="float32")
+        with self._lock:
+            self._open()
+            self._remember(key, vector)
+            if not self.directory:
+                return
+            dim = vector.shape[0]
+            tier = self._disk.get(dim)
+            if tier is None:
+                tier = self._disk[dim] = _DiskTier(self.directory, dim)
+            tier.put(key, vector)
+            self._recency[key] = dim
+            self._recency.move_to_end(key)
+            if self.disk_bytes > self.max_disk_bytes:
+                self._evict()
+
+    def _remember(self, key, vector):
+        self._memory[key] = vector
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_memory_entries:
+            self._memory.popitem(last=False)
+
+    def _touch(self, key):
+        if key in self._recency:
+            self._recency.move_to_end(key)
+
+    @property
+    def disk_bytes(self):
+        return sum(tier.size_bytes for tier in self._disk.values())
+
+    def _evict(self):
+        """Drops least recently used disk entries until the tier is at 75% of its budget."""
+        target = int(self.max_disk_bytes * 0.75)
+        size = self.disk_bytes
+        while self._recency and size > target:
+            key, dim = self._recency.popitem(last=False)
+            size -= self._disk[dim].row_bytes + KEY_SIZE
+        for dim, tier in self._disk.items():
+            tier.rewrite([key for key, d in self._recency.items() if d == dim])
+
+    def flush(self):
+        with self._lock:
+            for tier in self._disk.values():
+                tier.flush()
+
+    def close(self):
+        with self._lock:
+            for tier in self._disk.values():
+                tier.close()
+            self._disk = {}
+
+    def stats(self):
+        hits = self.memory_hits + self.disk_hits
+        total = hits + self.misses
+        return {
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_rate": hits / total if total else 0.0,
+            "memory_entries": len(self._memory),
+            "disk_entries": len(self._recency),
+            "disk_bytes": self.disk_bytes,
+        }
@@ -0,0 +1,257 @@
+import multiprocessing
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from multiprocessing.connection import wait
+import sympy as sp
+from sympy.parsing.sympy_parser import (convert_xor, implicit_multiplication_application, parse_expr,
+                                        standard_transformations)
+
+# Equation solving service for art.solve_equation.
+# Input is validated and parsed once (unevaluated, so "9**9**9" is not computed
+# while parsing) into a canonical form that keys an LRU result cache. Solves run
+# in long-lived worker processes with a memory cap; a solve that overruns its
+# timeout gets its worker killed and replaced, and the caller gets a clean error.
+# Solutions, solver errors and timeouts are cached; worker crashes are not.
+
+SOLVE_TIMEOUT = 5.0
+MAX_EQUATION_LENGTH = 500
+WORKER_MEMORY_LIMIT = 1 << 30  # Bytes of address space per worker, where the platform supports it
+ALLOWED_NAMES = {"x", "sin", "cos", "tan", "asin", "acos", "atan", "sinh", "cosh", "tanh",
+                 "exp", "log", "ln", "sqrt", "abs", "Abs", "pi", "E", "I", "oo"}
+ALLOWED_CHARACTERS = re.compile(r"^[\w\s+\-*/^().,=]*$")
+TRANSFORMATIONS = standard_transformations + (implicit_multiplication_application, convert_xor)
+X = sp.Symbol("x")
+
+
+class EquationError(ValueError):
+    pass
+
+
+def canonicalize(equation):
+    """Validates and parses an equation; returns the canonical srepr string of `lhs - rhs`."""
+    equation = equation.strip().rstrip("?.").strip()
+    if not equation:
+        raise EquationError("empty equation")
+    if len(equation) > MAX_EQUATION_LENGTH:
+        raise EquationError(f"equation longer than {MAX_EQUATION_LENGTH} characters")
+    if not ALLOWED_CHARACTERS.match(equation) or "__" in equation:
+        raise EquationError("equation contains unsupported characters")
+    unknown = {name for name in re.findall(r"[A-Za-z_]\w*", equation) if name not in ALLOWED_NAMES}
+    if unknown:
+        raise EquationError(f"unsupported names: {', '.join(sorted(unknown))}")
+
+    sides = equation.split("=")
+    if len(sides) > 2:
+        raise EquationError("more than one '=' in equation")
+    if not all(side.strip() for side in sides):
+        raise EquationError("missing expression on one side of '='")
+    local_dict = {"x": X, "ln": sp.log, "abs": sp.Abs}
+    try:
+        expressions = [parse_expr(side, local_dict=local_dict, transformations=TRANSFORMATIONS, evaluate=False)
+                       for side in sides]
+    except Exception as e:
+        raise EquationError(f"could not parse equation: {e}") from e
+    expr = expressions[0] if len(expressions) == 1 else sp.Add(expressions[0], -expressions[1], evaluate=False)
+    return sp.srepr(expr)
+
+
+def _solve_canonical(canonical):
+    expr = sp.sympify(canonical)
+    return str(sp.solve(expr, X))
+
+
+def _worker_main(conn, memory_limit):
+    try:
+        import resource
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit, memory_limit))
+    except (ImportError, ValueError, OSError):
+        pass  # No address-space limits on this platform
+    while True:
+        try:
+            canonical = conn.recv()
+        except EOFError:
+            return
+        try:
+            conn.send(("ok", _solve_canonical(canonical)))
+        except MemoryError:
+            conn.send(("error", "ran out of memory"))
+        except Exception as e:
+            conn.send(("error", str(e)))
+
+
+class _Worker:
+    def __init__(self, context, memory_limit):
+        self.conn, child_conn = context.Pipe()
+        self.process = context.Process(target=_worker_main, args=(child_conn, memory_limit), daemon=True)
+        self.process.start()
+        child_conn.close()
+
+    def kill(self):
+        self.process.kill()
+        self.process.join()
+        self.conn.close()
+
+
+class EquationSolver:
+    def __init__(self, max_workers=None, timeout=SOLVE_TIMEOUT, cache_size=10000,
+                 memory_limit=WORKER_MEMORY_LIMIT):
+        self.max_workers = max_workers or os.cpu_count() or 2
+        self.timeout = timeout
+        self.cache_size = cache_size
+        self.memory_limit = memory_limit
+        self._context = multiprocessing.get_context("spawn")  # Safe to start from threaded processes
+        self._idle = []
+        self._started = 0
+        self._cache = OrderedDict()  # canonical form -> result string
+        self._lock = threading.Condition()
+        self.cache_hits = 0
+        self.timeouts = 0
+
+    # -------------------------------
+    # Worker pool
+    # -------------------------------
+    def _checkout(self, wanted):
+        """Takes up to `wanted` workers (at least one, blocking if all are busy)."""
+        with self._lock:
+            while not self._idle and self._started >= self.max_workers:
+                self._lock.wait()
+            workers = self._idle[:wanted]
+            del self._idle[:wanted]
+            while len(workers) < wanted and self._started < self.max_workers:
+                self._started += 1
+                workers.append(None)  # Started outside the lock
+        return [worker or _Worker(self._context, self.memory_limit) for worker in workers]
+
+    def _checkin(self, worker, broken=False):
+        with self._lock:
+            if broken:
+                worker.kill()
+                self._started -= 1
+            else:
+                self._idle.append(worker)
+            self._lock.notify()
+
+    # -------------------------------
+    # Cache
+    # -------------------------------
+    def _cached(self, canonical):
+        with self._lock:
+            result = self._cache.get(canonical)
+            if result is not None:
+                self._cache.move_to_end(canonical)
+                self.cache_hits += 1
+            return result
+
+    def _remember(self, canonical, result):
+        with self._lock:
+            self._cache[canonical] = result
+            self._cache.move_to_end(canonical)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    # -------------------------------
+    # Solving
+    # -------------------------------
+    def solve(self, equation):
+        """Solves one equation for x; returns the same strings as art.solve_equation."""
+        return self.solve_many([equation])[0]
+
+    def solve_many(self, equations):
+        """Solves equations in parallel across worker processes; results are in input order."""
+        results = [None] * len(equations)
+        todo = {}  # canonical form -> indexes of equations with that form
+        for i, equation in enumerate(equations):
+            try:
+                canonical = canonicalize(equation)
+            except EquationError as e:
+                results[i] = f"Error solving equation: {e}"
+                continue
+            cached = self._cached(canonical)
+            if cached is not None:
+                results[i] = cached
+            else:
+                todo.setdefault(canonical, []).append(i)
+
+        def finish(canonical, result):
+            for i in todo[canonical]:
+                results[i] = result
+
+        pending = list(todo)
+        workers = self._checkout(len(pending)) if pending else []
+        running = {}  # worker -> (canonical, deadline)
+        try:
+            while pending or running:
+                while pending and workers:
+                    worker = workers.pop()
+                    canonical = pending.pop()
+                    try:
+                        worker.conn.send(canonical)
+                    except OSError:  # Worker died while idle (e.g. BrokenPipeError)
+                        self._checkin(worker, broken=True)
+                        finish(canonical, "Error solving equation: solver process crashed")
+                        continue
+                    running[worker] = (canonical, time.monotonic() + self.timeout)
+                if not running:
+                    workers = self._checkout(len(pending))
+                    continue
+
+                next_deadline = min(deadline for _, deadline in running.values())
+                ready = wait([worker.conn for worker in running], max(0.0, next_deadline - time.monotonic()))
+                now = time.monotonic()
+                for worker in list(running):
+                    canonical, deadline = running[worker]
+                    if worker.conn in ready:
+                        try:
+                            status, value = worker.conn.recv()
+                        except (EOFError, OSError):  # Worker died, e.g. killed by the memory limit
+                            # Not cached: the crash may be transient (a killed or starved worker).
+                            self._checkin(worker, broken=True)
+                            result = "Error solving equation: solver process crashed"
+                        else:
+                            workers.append(worker)
+                            result = f"Solution: {value}" if status == "ok" else f"Error solving equation: {value}"
+                            self._remember(canonical, result)  # Solutions and solver errors are deterministic
+                    elif deadline <= now:
+                        self.timeouts += 1
+                        self._checkin(worker, broken=True)
+                        result = f"Error solving equation: timed out after {self.timeout:g}s"
+                        # Cached on purpose: each worker has a CPU of its own, so an input that overruns
+                        # once will overrun again, and re-solving it would kill a worker on every call.
+                        self._remember(canonical, result)
+                    else:
+                        continue
+                    del running[worker]
+                    finish(canonical, result)
+        finally:
+            for worker in running:
+                self._checkin(worker, broken=True)
+            for worker in workers:
+                self._checkin(worker)
+        return results
+
+    def close(self):
+        with self._lock:
+            for worker in self._idle:
+                worker.kill()
+            self._started -= len(self._idle)
+            self._idle = []
+
+    def stats(self):
+        return {"cache_entries": len(self._cache), "cache_hits": self.cache_hits,
+                "timeouts": self.timeouts, "workers": self._started}
+
+
+_solver = None
+_solver_lock = threading.Lock()
+
+
+def get_solver():
+    """Returns the process-wide solver; workers are only started on the first solve."""
+    global _solver
+    with _solver_lock:
+        if _solver is None:
+            _solver = EquationSolver(timeout=float(os.getenv("EQUATION_SOLVE_TIMEOUT", SOLVE_TIMEOUT)))
+        return _solver
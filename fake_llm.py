@@ -0,0 +1,53 @@
+import asyncio
+import time
+
+# Local stand-in for genai.GenerativeModel.
+# It answers every prompt with canned text split into chunks and sleeps between
+# them, so streaming, latency and load behaviour can be exercised offline.
+
+
+class FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    def __init__(self, model_name="fake-model", chunks=None, responder=None,
+                 first_token_delay=0.2, chunk_delay=0.05):
+        self.model_name = model_name
+        self.chunks = chunks or ["This ", "is ", "a ", "canned ", "answer."]
+        self.responder = responder  # Optional callable: prompt -> answer text (split on spaces into chunks)
+        self.first_token_delay = first_token_delay
+        self.chunk_delay = chunk_delay
+        self.calls = 0
+
+    def _chunks_for(self, prompt):
+        self.calls += 1
+        if self.responder is None:
+            return list(self.chunks)
+        words = self.responder(prompt).split(" ")
+        return [word + " " for word in words[:-1]] + words[-1:]
+
+    def _stream(self, chunks):
+        for i, chunk in enumerate(chunks):
+            time.sleep(self.first_token_delay if i == 0 else self.chunk_delay)
+            yield FakeResponse(chunk)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        chunks = self._chunks_for(prompt)
+        if stream:
+            return self._stream(chunks)
+        time.sleep(self.first_token_delay + self.chunk_delay * (len(chunks) - 1))
+        return FakeResponse("".join(chunks))
+
+    async def _astream(self, chunks):
+        for i, chunk in enumerate(chunks):
+            await asyncio.sleep(self.first_token_delay if i == 0 else self.chunk_delay)
+            yield FakeResponse(chunk)
+
+    async def generate_content_async(self, prompt, stream=False, **kwargs):
+        chunks = self._chunks_for(prompt)
+        if stream:
+            return self._astream(chunks)
+        await asyncio.sleep(self.first_token_delay + self.chunk_delay * (len(chunks) - 1))
+        return FakeResponse("".join(chunks))
@@ -0,0 +1,157 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+# Shared LLM response cache.
+# Responses are keyed on model name, a hash of the prompt and the generation
+# parameters, and stored per namespace (usually one per agent) with that
+# namespace's TTL. A bounded in-memory LRU sits in front of an optional SQLite
+# tier, so identical prompts across agents and restarts skip the model call.
+
+DEFAULT_TTL = 3600
+DEFAULT_TTLS = {
+    "booking": 15 * 60,  # Availability and prices move quickly
+    "ecommerce": 60 * 60,
+    "recommendation": 60 * 60,
+    "reporting": 24 * 60 * 60,
+    "rag": 60 * 60,
+}
+
+
+def response_key(model_name, prompt, params=None):
+    """Returns the cache key for one generate_content request."""
+    h = hashlib.sha256()
+    h.update(model_name.encode("utf-8"))
+    h.update(b"\0")
+    h.update(hashlib.sha256(str(prompt).encode("utf-8")).digest())
+    h.update(json.dumps(params or {}, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+class CachedResponse:
+    """Minimal stand-in for a Gemini response: only `.text` is kept."""
+    def __init__(self, text):
+        self.text = text
+
+
+class ResponseCache:
+    def __init__(self, max_entries=5000, db_file=None, max_disk_entries=100000, ttls=None):
+        self.max_entries = max_entries
+        self.max_disk_entries = max_disk_entries
+        self.ttls = dict(DEFAULT_TTLS)
+        self.ttls.update(ttls or {})
+        self._memory = OrderedDict()  # key -> (expires_at, text)
+        self._lock = threading.Lock()
+        self._metrics = {}  # namespace -> {"hits", "misses", "disk_hits"}
+        self._writes = 0
+        self.conn = None
+        if db_file:
+            self.conn = sqlite3.connect(db_file, check_same_thread=False)
+            self.conn.execute("PRAGMA journal_mode=WAL")
+            self.conn.execute("""
+                CREATE TABLE IF NOT EXISTS responses (
+                    key TEXT PRIMARY KEY,
+                    namespace TEXT,
+                    text TEXT,
+                    created_at REAL,
+                    expires_at REAL
+                )
+            """)
+            self.conn.execute("CREATE INDEX IF NOT EXISTS idx_responses_created ON responses(created_at)")
+            self.conn.commit()
+
+    def set_ttl(self, namespace, seconds):
+        self.ttls[namespace] = seconds
+
+    def ttl(self, namespace):
+        return self.ttls.get(namespace, DEFAULT_TTL)
+
+    def _count(self, namespace, field):
+        counters = self._metrics.setdefault(namespace, {"hits": 0, "disk_hits": 0, "misses": 0})
+        counters[field] += 1
+
+    def get(self, namespace, key):
+        """Returns the cached text, or None if missing or expired."""
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None:
+                if entry[0] > now:
+                    self._memory.move_to_end(key)
+                    self._count(namespace, "hits")
+                    return entry[1]
+                del self._memory[key]
+            if self.conn is not None:
+                row = self.conn.execute("SELECT text, expires_at FROM responses WHERE key=?", (key,)).fetchone()
+                if row and row[1] > now:
+                    self._remember(key, row[1], row[0])
+                    self._count(namespace, "hits")
+                    self._count(namespace, "disk_hits")
+                    return row[0]
+            self._count(namespace, "misses")
+            return None
+
+    def put(self, namespace, key, text):
+        now = time.time()
+        expires_at = now + self.ttl(namespace)
+        with self._lock:
+            self._remember(key, expires_at, text)
+            if self.conn is None:
+                return
+            self.conn.execute("""
+                INSERT INTO responses (key, namespace, text, created_at, expires_at) VALUES (?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET text = excluded.text, created_at = excluded.created_at,
+                    expires_at = excluded.expires_at
+            """, (key, namespace, text, now, expires_at))
+            self._writes += 1
+            if self._writes % 1000 == 0:
+                self._prune(now)
+            self.conn.commit()
+
+    def _remember(self, key, expires_at, text):
+        self._memory[key] = (expires_at, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    def _prune(self, now):
+        """Drops expired rows, then the oldest rows beyond the disk budget."""
+        self.conn.execute("DELETE FROM responses WHERE expires_at <= ?", (now,))
+        self.conn.execute("""
+            DELETE FROM responses WHERE key IN (
+                SELECT key FROM responses ORDER BY created_at DESC LIMIT -1 OFFSET ?
+            )
+        """, (self.max_disk_entries,))
+
+    def stats(self):
+        """Per-namespace hit/miss counters and hit rates."""
+        with self._lock:
+            result = {}
+            for namespace, counters in self._metrics.items():
+                total = counters["hits"] + counters["misses"]
+                result[namespace] = dict(counters, hit_rate=counters["hits"] / total if total else 0.0)
+            return result
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache():
+    """Returns the process-wide cache; LLM_CACHE_DB enables the on-disk tier."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(db_file=os.getenv("LLM_CACHE_DB") or None)
+        return _cache
+
+
+def set_response_cache(cache):
+    global _cache
+    with _cache_lock:
+        _cache = cache
+    return cache
@@ -0,0 +1,305 @@
+import asyncio
+import os
+import random
+import threading
+import time
+from llm_cache import CachedResponse, get_response_cache, response_key
+
+# Shared LLM client used by every technique and agent.
+# One process-wide LLMClient reuses model objects and puts every
+# generate_content call behind a token-bucket rate limiter, a bounded
+# concurrency cap, a request timeout and exponential-backoff retries.
+# The backend is pluggable: Gemini by default, or the local fake from
+# fake_llm.py when LLM_BACKEND=fake (load tests, offline benchmarks).
+
+DEFAULT_REQUESTS_PER_MINUTE = int(os.getenv("LLM_REQUESTS_PER_MINUTE", "600"))
+DEFAULT_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+DEFAULT_MAX_RETRIES = int(os.getenv("LLM_MAX_RETRIES", "5"))
+DEFAULT_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "60"))
+SLOT_POLL_INTERVAL = 0.005  # Seconds between tries when an async call waits for a concurrency slot
+
+
+# -------------------------------
+# Rate Limiting
+# -------------------------------
+class TokenBucket:
+    """Allows `rate` requests per second on average with bursts of up to `capacity`."""
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _take(self):
+        """Takes a token if one is available; otherwise returns the seconds to wait."""
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+    def acquire(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            time.sleep(wait)
+
+    async def acquire_async(self):
+        while True:
+            wait = self._take()
+            if not wait:
+                return
+            await asyncio.sleep(wait)
+
+
+# -------------------------------
+# Backends
+# -------------------------------
+class GeminiBackend:
+    name = "gemini"
+
+    def __init__(self, api_key=None):
+        import google.generativeai as genai
+        api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        if not api_key:
+            raise Exception("Please set your GOOGLE_API_KEY environment variable.")
+        genai.configure(api_key=api_key)
+        self.genai = genai
+
+    def create_model(self, model_name):
+        return self.genai.GenerativeModel(model_name)
+
+    def request_kwargs(self, timeout):
+        return {"request_options": {"timeout": timeout}}
+
+
+class FakeBackend:
+    name = "fake"
+
+    def __init__(self, **model_kwargs):
+        self.model_kwargs = model_kwargs  # Passed through to FakeGenerativeModel (delays, canned chunks)
+
+    def create_model(self, model_name):
+        from fake_llm import FakeGenerativeModel
+        return FakeGenerativeModel(model_name, **self.model_kwargs)
+
+    def request_kwargs(self, timeout):
+        return {}
+
+
+def default_backend():
+    if os.getenv("LLM_BACKEND", "gemini").lower() == "fake":
+        return FakeBackend()
+    return GeminiBackend()
+
+
+def is_retryable(error):
+    """Rate limits, timeouts and transient server errors are retried; everything else is raised."""
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    try:
+        from google.api_core import exceptions
+    except ImportError:
+        return False
+    return isinstance(error, (exceptions.ResourceExhausted, exceptions.ServiceUnavailable,
+                              exceptions.DeadlineExceeded, exceptions.InternalServerError))
+
+
+# -------------------------------
+# Client
+# -------------------------------
+class LLMClient:
+    def __init__(self, backend=None, requests_per_minute=DEFAULT_REQUESTS_PER_MINUTE,
+                 max_concurrency=DEFAULT_MAX_CONCURRENCY, max_retries=DEFAULT_MAX_RETRIES,
+                 timeout=DEFAULT_TIMEOUT, backoff_base=1.0, backoff_max=30.0):
+        self.backend = backend or default_backend()
+        self.rate_limiter = TokenBucket(requests_per_minute / 60.0)
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self._semaphore = threading.BoundedSemaphore(max_concurrency)  # Shared by sync and async calls
+        self._models = {}
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.retries = 0
+
+    def model(self, model_name="gemini-2.0-flash", cache_namespace=None):
+        """
+        Returns a shared handle whose generate_content goes through this client.
+        With `cache_namespace` set, non-streaming responses are served from and
+        stored in the shared response cache under that namespace's TTL.
+        """
+        with self._lock:
+            model = self._models.get(model_name)
+            if model is None:
+                model = self._models[model_name] = self.backend.create_model(model_name)
+            return PooledModel(self, model_name, model, cache_namespace)
+
+    def _backoff(self, attempt):
+        delay = min(self.backoff_max, self.backoff_base * (2 ** attempt))
+        return delay * random.uniform(0.5, 1.0)  # Jitter so retries from many threads spread out
+
+    async def _acquire_async(self):
+        """Takes a slot of the process-wide concurrency limit without blocking the event loop."""
+        while not self._semaphore.acquire(blocking=False):
+            await asyncio.sleep(SLOT_POLL_INTERVAL)
+
+    def _count(self, retry=False):
+        with self._lock:
+            self.calls += 1
+            self.retries += retry
+
+    def generate_content(self, model, prompt, stream=False, **kwargs):
+        kwargs = {**self.backend.request_kwargs(self.timeout), **kwargs}
+        for attempt in range(self.max_retries + 1):
+            self.rate_limiter.acquire()
+            self._semaphore.acquire()
+            try:
+                self._count(retry=attempt > 0)
+                response = model.generate_content(prompt, stream=stream, **kwargs)
+            except Exception as e:
+                self._semaphore.release()
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise
+                time.sleep(self._backoff(attempt))
+                continue
+            if stream:
+                # Hold the concurrency slot until the caller has drained the stream.
+                return HeldStream(response, self._semaphore)
+            self._semaphore.release()
+            return response
+
+    async def generate_content_async(self, model, prompt, stream=False, **kwargs):
+        kwargs = {**self.backend.request_kwargs(self.timeout), **kwargs}
+        for attempt in range(self.max_retries + 1):
+            await self.rate_limiter.acquire_async()
+            await self._acquire_async()
+            try:
+                self._count(retry=attempt > 0)
+                response = await asyncio.wait_for(
+                    model.generate_content_async(prompt, stream=stream, **kwargs), self.timeout)
+            except BaseException as e:
+                self._semaphore.release()
+                if not isinstance(e, Exception):
+                    raise  # Cancelled
+                if isinstance(e, asyncio.TimeoutError):
+                    e = TimeoutError(str(e))
+                if attempt == self.max_retries or not is_retryable(e):
+                    raise e
+                await asyncio.sleep(self._backoff(attempt))
+                continue
+            if stream:
+                return HeldStream(response, self._semaphore)
+            self._semaphore.release()
+            return response
+
+    def stats(self):
+        return {"backend": self.backend.name, "calls": self.calls, "retries": self.retries,
+                "models": sorted(self._models), "cache": get_response_cache().stats()}
+
+
+class HeldStream:
+    """
+    A streamed response that holds a concurrency slot until it is drained, closed
+    or garbage collected. Iterate it with `for` or `async for`, like the original.
+    """
+    def __init__(self, chunks, semaphore):
+        self.chunks = chunks
+        self._semaphore = semaphore
+        self._held = True
+
+    def release(self):
+        if self._held:
+            self._held = False
+            self._semaphore.release()
+
+    def __iter__(self):
+        try:
+            yield from self.chunks
+        finally:
+            self.release()
+
+    async def __aiter__(self):
+        try:
+            async for chunk in self.chunks:
+                yield chunk
+        finally:
+            self.release()
+
+    def close(self):
+        self.release()
+
+    async def aclose(self):
+        self.release()
+
+    def __del__(self):
+        self.release()
+
+
+class PooledModel:
+    """Drop-in replacement for genai.GenerativeModel that routes calls through an LLMClient."""
+    def __init__(self, client, model_name, model, cache_namespace=None):
+        self.client = client
+        self.model_name = model_name
+        self.model = model
+        self.cache_namespace = cache_namespace
+
+    def _cache_lookup(self, prompt, kwargs):
+        if self.cache_namespace is None or kwargs.get("stream"):
+            return None, None
+        key = response_key(self.model_name, prompt, kwargs)
+        text = get_response_cache().get(self.cache_namespace, key)
+        return key, (CachedResponse(text) if text is not None else None)
+
+    def _cache_store(self, key, response):
+        if key is None:
+            return
+        try:
+            text = response.text
+        except ValueError:
+            return  # Blocked or empty responses have no text to cache
+        get_response_cache().put(self.cache_namespace, key, text)
+
+    def generate_content(self, prompt, **kwargs):
+        key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = self.client.generate_content(self.model, prompt, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+    async def generate_content_async(self, prompt, **kwargs):
+        key, cached = self._cache_lookup(prompt, kwargs)
+        if cached is not None:
+            return cached
+        response = await self.client.generate_content_async(self.model, prompt, **kwargs)
+        self._cache_store(key, response)
+        return response
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Returns the process-wide client, creating it on first use."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = LLMClient()
+        return _client
+
+
+def set_client(client):
+    """Replaces the process-wide client (e.g. with a fake-backed one in load tests)."""
+    global _client
+    with _client_lock:
+        _client = client
+    return client
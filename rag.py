@@ -1,74 +1,528 @@
-
+import asyncio
+import atexit
 import faiss
 import json
+import mmap
 import os
+import threading
+import time
 import google.generativeai as genai
 import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
 from dotenv import load_dotenv
+from embedding_cache import EmbeddingCache
+from llm_client import get_client
+from text_vectors import hash_embeddings
 load_dotenv()
 # Set your Gemini API Key
-os.environ["GOOGLE_API_KEY"] = os.getenv("GOOGLE_API_KEY")
-genai.configure(api_key=os.environ["GOOGLE_API_KEY"])
+GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
+if GOOGLE_API_KEY:
+    genai.configure(api_key=GOOGLE_API_KEY)
 
 # FAISS Index Path
 index_path = "faiss_index"
+text_data_path = "text_data.json"  # Legacy JSON chunk list, read only when no chunk store exists
+chunk_store_path = "text_data"  # Binary chunk store: text_data.bin (UTF-8 blob) + text_data.idx (offsets)
 
-import numpy as np
-import google.generativeai as genai
+# Embedding settings
+EMBEDDING_MODEL = "models/text-embedding-004"
+EMBED_BATCH_SIZE = 100  # The embedding API accepts up to 100 texts per request
+EMBED_MAX_WORKERS = 4
+EMBED_MAX_RETRIES = 3
+
+# Embedding cache shared by single-text and batched embedding calls (its directory is created on first use)
+embedding_cache = EmbeddingCache(directory=".embedding_cache")
+atexit.register(embedding_cache.flush)
 
-def get_google_embeddings(text):
-    """Get embeddings from Google's embedding model (models/embedding-001)."""
-    model = genai.GenerativeModel("models/embedding-001")  # Correct model
-    response = genai.embed_content("models/text-embedding-004", text, task_type="retrieval_document")
+def get_google_embeddings(text, task_type="retrieval_document"):
+    """Get embeddings from Google's embedding model (models/text-embedding-004)."""
+    cached = embedding_cache.get(EMBEDDING_MODEL, task_type, text)
+    if cached is not None:
+        return cached.tolist()
+    response = genai.embed_content(EMBEDDING_MODEL, text, task_type=task_type)
+    embedding_cache.put(EMBEDDING_MODEL, task_type, text, response["embedding"])
     return response["embedding"]  # Extract embedding vector
 
 
-def create_faiss_index(text_chunks):
-    """Create FAISS index from text chunks using Google Embeddings."""
-    embeddings = [get_google_embeddings(text) for text in text_chunks]
+# -------------------------------
+# Embedding Backends
+# -------------------------------
+class GoogleEmbeddingBackend:
+    """Embeds batches of texts with a single Gemini embedding request per batch."""
+    def __init__(self, model_name=EMBEDDING_MODEL):
+        self.model_name = model_name
+
+    def embed(self, texts, task_type="retrieval_document"):
+        response = genai.embed_content(self.model_name, list(texts), task_type=task_type)
+        return np.array(response["embedding"], dtype="float32")
+
+
+class LocalEmbeddingBackend:
+    """Deterministic hashed embeddings computed locally; used for offline builds and benchmarks."""
+    def __init__(self, dim=768, delay=0.0):
+        self.model_name = f"local-hash-{dim}"
+        self.dim = dim
+        self.delay = delay  # Simulated per-batch round trip, in seconds
+
+    def embed(self, texts, task_type="retrieval_document"):
+        if self.delay:
+            time.sleep(self.delay)
+        return hash_embeddings(list(texts), self.dim)
+
+
+class CachedEmbeddingBackend:
+    """Wraps a backend so only texts missing from the embedding cache are sent to it."""
+    def __init__(self, backend, cache):
+        self.backend = backend
+        self.cache = cache
+        self.model_name = backend.model_name
+
+    def embed(self, texts, task_type="retrieval_document"):
+        texts = list(texts)
+        vectors = [self.cache.get(self.model_name, task_type, text) for text in texts]
+        missing = [i for i, vector in enumerate(vectors) if vector is None]
+        if missing:
+            embedded = self.backend.embed([texts[i] for i in missing], task_type=task_type)
+            for i, vector in zip(missing, embedded):
+                self.cache.put(self.model_name, task_type, texts[i], vector)
+                vectors[i] = vector
+        return np.array(vectors, dtype="float32")
+
+
+default_embedding_backend = CachedEmbeddingBackend(GoogleEmbeddingBackend(), embedding_cache)
+
+
+def _embed_with_retries(backend, batch, task_type, max_retries):
+    """Embeds one batch, retrying with exponential backoff when the backend fails."""
+    for attempt in range(max_retries + 1):
+        try:
+            return backend.embed(batch, task_type=task_type)
+        except Exception:
+            if attempt == max_retries:
+                raise
+            time.sleep(0.5 * (2 ** attempt))
+
+
+def _batched(items, batch_size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) == batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def embed_in_batches(text_chunks, backend=None, batch_size=EMBED_BATCH_SIZE,
+                     max_workers=EMBED_MAX_WORKERS, max_retries=EMBED_MAX_RETRIES,
+                     task_type="retrieval_document"):
+    """
+    Embeds text chunks in batches with up to `max_workers` batches in flight.
+    Yields (batch, embeddings) pairs in input order, so callers can stream the
+    vectors into an index without holding every embedding in memory.
+    """
+    backend = backend or default_embedding_backend
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = deque()
+        for batch in _batched(text_chunks, batch_size):
+            pending.append((batch, executor.submit(_embed_with_retries, backend, batch, task_type, max_retries)))
+            # Bound the number of in-flight batches so memory stays flat.
+            if len(pending) >= max_workers * 2:
+                batch, future = pending.popleft()
+                yield batch, future.result()
+        while pending:
+            batch, future = pending.popleft()
+            yield batch, future.result()
+
+
+# -------------------------------
+# Index Factory
+# -------------------------------
+INDEX_TYPES = ("flat", "ivf", "hnsw", "ivfpq")
+DEFAULT_INDEX_PARAMS = {
+    "flat": {},
+    "ivf": {"nlist": 1024, "nprobe": 16},
+    "hnsw": {"m": 32, "ef_construction": 200, "ef_search": 64},
+    "ivfpq": {"nlist": 1024, "pq_m": 64, "pq_bits": 8, "nprobe": 16},
+}
+TRAIN_SAMPLE_SIZE = 50000  # Vectors buffered to train IVF coarse quantizers and PQ codebooks
+
+
+def index_params_path():
+    return f"{index_path}.params.json"
+
+
+def resolve_index_params(index_type="flat", **overrides):
+    """Merges user overrides into the defaults for an index type."""
+    if index_type not in INDEX_TYPES:
+        raise ValueError(f"Unknown index type {index_type!r}; expected one of {INDEX_TYPES}.")
+    params = dict(DEFAULT_INDEX_PARAMS[index_type])
+    params.update({k: v for k, v in overrides.items() if v is not None})
+    params["index_type"] = index_type
+    return params
+
+
+def build_faiss_index(d, index_type="flat", **params):
+    """Creates an empty (possibly untrained) FAISS index of the given type."""
+    params = resolve_index_params(index_type, **params)
+    if index_type == "flat":
+        return faiss.IndexFlatL2(d)
+    if index_type == "ivf":
+        return faiss.index_factory(d, f"IVF{params['nlist']},Flat")
+    if index_type == "hnsw":
+        index = faiss.IndexHNSWFlat(d, params["m"])
+        index.hnsw.efConstruction = params["ef_construction"]
+        return index
+    if d % params["pq_m"] != 0:
+        raise ValueError(f"pq_m={params['pq_m']} must divide the embedding dimension {d}.")
+    return faiss.index_factory(d, f"IVF{params['nlist']},PQ{params['pq_m']}x{params['pq_bits']}")
+
+
+def set_search_params(index, nprobe=None, ef_search=None):
+    """Applies query-time knobs: nprobe for IVF indexes, efSearch for HNSW."""
+    if nprobe is not None:
+        try:
+            faiss.extract_index_ivf(index).nprobe = nprobe
+        except RuntimeError:
+            pass  # Not an IVF index
+    if ef_search is not None and hasattr(index, "hnsw"):
+        index.hnsw.efSearch = ef_search
+
+
+def _train_and_add(index, params, vectors):
+    if not index.is_trained:
+        # k-means needs at least one training point per inverted list.
+        nlist = params.get("nlist")
+        if nlist and len(vectors) < nlist:
+            raise ValueError(f"Need at least nlist={nlist} vectors to train, got {len(vectors)}; lower nlist.")
+        index.train(vectors)
+    index.add(vectors)
+
+
+def create_faiss_index(text_chunks, backend=None, batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_MAX_WORKERS,
+                       index_type="flat", train_sample_size=TRAIN_SAMPLE_SIZE, **index_params):
+    """Create FAISS index from text chunks, embedding them in concurrent batches."""
+    start = time.perf_counter()
+    params = resolve_index_params(index_type, **index_params)
+    index = None
+    training_buffer = []  # Embeddings held back until the index is trained
+    buffered = 0
+    chunk_writer = ChunkStoreWriter()
+
+    try:
+        for batch, embeddings in embed_in_batches(text_chunks, backend, batch_size, max_workers):
+            if index is None:
+                d = embeddings.shape[1]  # Embedding dimension
+                index = build_faiss_index(d, **params)
+            chunk_writer.extend(batch)
+            if index.is_trained:
+                index.add(embeddings)
+                continue
+            training_buffer.append(embeddings)
+            buffered += len(embeddings)
+            if buffered >= train_sample_size:
+                _train_and_add(index, params, np.vstack(training_buffer))
+                training_buffer = []
+
+        if index is None:
+            raise ValueError("No text chunks to index.")
+        if training_buffer:
+            _train_and_add(index, params, np.vstack(training_buffer))
+        set_search_params(index, params.get("nprobe"), params.get("ef_search"))
+
+        # Save index and text data; readers only pick them up once the version stamp changes
+        save_faiss_index(index, chunk_writer, params)
+    except BaseException:
+        chunk_writer.abort()  # Don't leave the temporary chunk store files behind
+        raise
+
+    elapsed = time.perf_counter() - start
+    stats = {
+        "chunks": index.ntotal,
+        "seconds": elapsed,
+        "chunks_per_second": index.ntotal / elapsed if elapsed > 0 else float("inf"),
+        "index_params": params,
+    }
+    print(f"FAISS index created and saved ({stats['chunks']} chunks, {stats['chunks_per_second']:.1f} chunks/s).")
+    return stats
+
+# -------------------------------
+# Binary Chunk Store
+# -------------------------------
+class ChunkStoreWriter:
+    """Streams chunks into a UTF-8 blob and a uint64 offsets table under temporary names."""
+    def __init__(self, path_prefix=None):
+        self.path_prefix = path_prefix or chunk_store_path
+        self.blob_file = open(f"{self.path_prefix}.bin.tmp", "wb")
+        self.offsets_file = open(f"{self.path_prefix}.idx.tmp", "wb")
+        self.offset = 0
+        self.count = 0
+        self.offsets_file.write(np.uint64(0).tobytes())
+
+    def extend(self, chunks):
+        offsets = []
+        for chunk in chunks:
+            data = chunk.encode("utf-8")
+            self.blob_file.write(data)
+            self.offset += len(data)
+            offsets.append(self.offset)
+        self.offsets_file.write(np.array(offsets, dtype=np.uint64).tobytes())
+        self.count += len(offsets)
+
+    def abort(self):
+        """Closes and deletes the temporary files; a no-op for files already committed."""
+        self.blob_file.close()
+        self.offsets_file.close()
+        for path in (f"{self.path_prefix}.bin.tmp", f"{self.path_prefix}.idx.tmp"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def commit(self):
+        """Closes the files and renames them into place (offsets last, so readers never outrun the blob)."""
+        self.blob_file.close()
+        self.offsets_file.close()
+        os.replace(f"{self.path_prefix}.bin.tmp", f"{self.path_prefix}.bin")
+        os.replace(f"{self.path_prefix}.idx.tmp", f"{self.path_prefix}.idx")
+
+
+class ChunkStore:
+    """
+    Read-only, memory-mapped view of a chunk store. Only the chunks that are
+    actually indexed get decoded, and processes opening the same files share
+    their pages through the OS page cache.
+    """
+    def __init__(self, path_prefix=None):
+        path_prefix = path_prefix or chunk_store_path
+        with open(f"{path_prefix}.idx", "rb") as f:
+            self._offsets_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self.offsets = np.frombuffer(self._offsets_map, dtype=np.uint64)
+        with open(f"{path_prefix}.bin", "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            self._blob = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        return self._blob[int(self.offsets[i]):int(self.offsets[i + 1])].decode("utf-8")
+
+    def get_many(self, ids):
+        """Decodes the chunks for a list of ids, skipping FAISS's -1 padding."""
+        return [self[int(i)] for i in ids if 0 <= i < len(self)]
+
+
+def chunk_store_exists(path_prefix=None):
+    path_prefix = path_prefix or chunk_store_path
+    return os.path.exists(f"{path_prefix}.idx") and os.path.exists(f"{path_prefix}.bin")
+
+
+def _replace_file(path, write):
+    """Writes a file next to `path` and renames it into place, so readers never see a partial file."""
+    tmp_path = f"{path}.tmp"
+    write(tmp_path)
+    os.replace(tmp_path, path)
+
+
+def version_path():
+    return f"{index_path}.version"
 
-    # Create FAISS index
-    d = len(embeddings[0])  # Embedding dimension
-    index = faiss.IndexFlatL2(d)
-    index.add(np.array(embeddings, dtype="float32"))
 
-    # Save index
-    faiss.write_index(index, index_path)
+def save_faiss_index(index, text_chunks, params=None):
+    """
+    Atomically save the FAISS index, its parameters and text chunks, then bump the version stamp.
+    `text_chunks` is a list of strings or a ChunkStoreWriter that already holds them.
+    """
+    _replace_file(index_path, lambda path: faiss.write_index(index, path))
+
+    def write_params(path):
+        with open(path, "w") as f:
+            json.dump(params or resolve_index_params("flat"), f, indent=2)
+
+    def write_version(path):
+        with open(path, "w") as f:
+            f.write(str(time.time_ns()))
+
+    _replace_file(index_params_path(), write_params)
+    if not isinstance(text_chunks, ChunkStoreWriter):
+        writer = ChunkStoreWriter()
+        writer.extend(text_chunks)
+        text_chunks = writer
+    text_chunks.commit()
+    _replace_file(version_path(), write_version)
+
+
+def load_index_params():
+    """Returns the parameters recorded next to the saved index (flat defaults for older indexes)."""
+    try:
+        with open(index_params_path(), "r") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return resolve_index_params("flat")
+
 
-    # Save text data
-    with open("text_data.json", "w") as f:
-        json.dump(text_chunks, f)
+MMAP_INDEX_TYPES = ("flat", "ivf", "ivfpq")  # HNSW graphs cannot be memory-mapped
 
-    print("FAISS index created and saved.")
 
-def load_faiss_index():
-    """Load FAISS index and text chunks."""
+def read_index_mmap(path, index_type):
+    """Opens the index memory-mapped when its type allows it, otherwise reads it into RAM."""
+    if index_type in MMAP_INDEX_TYPES:
+        try:
+            return faiss.read_index(path, faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            pass  # This FAISS build cannot mmap the index type
+    return faiss.read_index(path)
+
+
+def load_faiss_index(nprobe=None, ef_search=None):
+    """Load FAISS index and text chunks, applying the recorded (or overridden) search parameters."""
     if not os.path.exists(index_path):
         raise FileNotFoundError("FAISS index not found. Create it first.")
 
-    index = faiss.read_index(index_path)
-    with open("text_data.json", "r") as f:
-        text_chunks = json.load(f)
+    params = load_index_params()
+    index = read_index_mmap(index_path, params.get("index_type", "flat"))
+    set_search_params(index,
+                      nprobe if nprobe is not None else params.get("nprobe"),
+                      ef_search if ef_search is not None else params.get("ef_search"))
+    if chunk_store_exists():
+        text_chunks = ChunkStore()
+    else:
+        with open(text_data_path, "r") as f:
+            text_chunks = json.load(f)
 
     return index, text_chunks
 
-def retrieve_documents(query, top_k=3):
+
+# -------------------------------
+# Resident Retriever
+# -------------------------------
+class RAGRetriever:
+    """
+    Keeps the FAISS index and text chunks in memory across queries.
+    The files are re-read only when the version stamp (or, without one, the
+    files' mtimes) changes, and the new pair is swapped in as one object, so
+    concurrent searches always see a consistent index and chunk list.
+    """
+    def __init__(self, check_interval=1.0, nprobe=None, ef_search=None):
+        self.check_interval = check_interval  # Seconds between on-disk change checks
+        self.nprobe = nprobe  # Query-time overrides of the parameters saved with the index
+        self.ef_search = ef_search
+        self._lock = threading.Lock()
+        self._snapshot = None  # (signature, index, text_chunks)
+        self._last_check = 0.0
+
+    def _signature(self):
+        try:
+            with open(version_path(), "r") as f:
+                return ("version", f.read().strip())
+        except FileNotFoundError:
+            chunks_path = f"{chunk_store_path}.idx" if chunk_store_exists() else text_data_path
+            stats = [os.stat(path) for path in (index_path, chunks_path)]
+            return ("mtime",) + tuple((s.st_mtime_ns, s.st_size) for s in stats)
+
+    def _refresh(self):
+        now = time.monotonic()
+        snapshot = self._snapshot
+        if snapshot is not None and now - self._last_check < self.check_interval:
+            return snapshot
+
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and now - self._last_check < self.check_interval:
+                return snapshot
+            signature = self._signature()
+            if snapshot is None or snapshot[0] != signature:
+                index, text_chunks = load_faiss_index(self.nprobe, self.ef_search)
+                if snapshot is not None and index.ntotal != len(text_chunks):
+                    # A writer is between files; keep serving the old pair and retry on the next check.
+                    self._last_check = now
+                    return snapshot
+                snapshot = (signature, index, text_chunks)
+                self._snapshot = snapshot
+            self._last_check = now
+            return snapshot
+
+    def get(self):
+        """Returns the current (index, text_chunks) pair, reloading it if the files changed."""
+        _, index, text_chunks = self._refresh()
+        return index, text_chunks
+
+    def set_search_params(self, nprobe=None, ef_search=None):
+        """Tunes nprobe/efSearch on the resident index and on future reloads."""
+        with self._lock:
+            self.nprobe = nprobe if nprobe is not None else self.nprobe
+            self.ef_search = ef_search if ef_search is not None else self.ef_search
+            if self._snapshot is not None:
+                set_search_params(self._snapshot[1], self.nprobe, self.ef_search)
+
+    def reload(self):
+        """Forces the next query to re-check the files on disk."""
+        with self._lock:
+            self._last_check = 0.0
+
+    def search(self, query_embeddings, top_k=3):
+        index, text_chunks = self.get()
+        distances, indices = index.search(np.asarray(query_embeddings, dtype="float32"), top_k)
+        return distances, indices, text_chunks
+
+
+default_retriever = RAGRetriever()
+
+
+def retrieve_documents(query, top_k=3, retriever=None, backend=None):
     """Retrieve top-k relevant documents using FAISS."""
-    index, text_chunks = load_faiss_index()
+    retriever = retriever or default_retriever
 
-    query_embedding = np.array([get_google_embeddings(query)], dtype="float32")
-    distances, indices = index.search(query_embedding, top_k)
+    if backend is None:
+        query_embedding = np.array([get_google_embeddings(query)], dtype="float32")
+    else:
+        query_embedding = backend.embed([query])
+    distances, indices, text_chunks = retriever.search(query_embedding, top_k)
 
-    retrieved_texts = [text_chunks[i] for i in indices[0] if i < len(text_chunks)]
+    if isinstance(text_chunks, ChunkStore):
+        return text_chunks.get_many(indices[0])
+    retrieved_texts = [text_chunks[i] for i in indices[0] if 0 <= i < len(text_chunks)]
     return retrieved_texts
 
-def generate_response(query):
-    """Generate response using retrieved documents and Gemini API."""
-    retrieved_docs = retrieve_documents(query)
+def retrieve_documents_batch(queries, top_k=3, retriever=None, backend=None,
+                             batch_size=EMBED_BATCH_SIZE, max_workers=EMBED_MAX_WORKERS):
+    """
+    Retrieve top-k documents for many queries at once.
+    Queries are embedded in concurrent batches and searched with a single
+    index.search over the stacked query matrix. Returns (distances, ids, texts):
+    two (n, top_k) arrays from FAISS and an (n, top_k) object array of texts,
+    with None where FAISS returned no hit (id -1).
+    """
+    retriever = retriever or default_retriever
+    queries = list(queries)
+    if not queries:
+        return np.zeros((0, top_k), dtype="float32"), np.zeros((0, top_k), dtype="int64"), \
+            np.empty((0, top_k), dtype=object)
 
-    # Construct prompt for Gemini
+    query_matrix = np.vstack([embeddings for _, embeddings in
+                              embed_in_batches(queries, backend, batch_size, max_workers)])
+    distances, indices, text_chunks = retriever.search(query_matrix, top_k)
+
+    texts = np.empty(indices.shape, dtype=object)
+    num_chunks = len(text_chunks)
+    # Decode each distinct hit once, even when many queries share it.
+    unique_ids = np.unique(indices[(indices >= 0) & (indices < num_chunks)])
+    decoded = {int(i): text_chunks[int(i)] for i in unique_ids}
+    for (row, col), i in np.ndenumerate(indices):
+        texts[row, col] = decoded.get(int(i))
+    return distances, indices, texts
+
+GENERATION_MODEL = "gemini-2.0-flash"
+
+def build_prompt(query, retrieved_docs):
+    """Construct the Gemini prompt from the query and retrieved documents."""
     context = "\n".join(retrieved_docs)
-    prompt = f"""
+    return f"""
     You are an AI assistant. Use the following retrieved documents to answer the query.
 
     Context:
@@ -79,12 +533,88 @@ def generate_response(query):
     Answer:
     """
 
+def generate_response(query):
+    """Generate response using retrieved documents and Gemini API."""
+    retrieved_docs = retrieve_documents(query)
+
+    # Construct prompt for Gemini
+    prompt = build_prompt(query, retrieved_docs)
+
     # Call Gemini API
-    model = genai.GenerativeModel("gemini-2.0-flash")
+    model = get_client().model(GENERATION_MODEL, cache_namespace="rag")
     response = model.generate_content(prompt)
 
     return response.text
 
+
+# -------------------------------
+# Streaming and Async Generation
+# -------------------------------
+def _start_metrics(metrics):
+    metrics = metrics if metrics is not None else {}
+    metrics.update({"time_to_first_token": None, "total_latency": None, "chunks": 0})
+    return metrics, time.perf_counter()
+
+
+def _record_chunk(metrics, start):
+    if metrics["time_to_first_token"] is None:
+        metrics["time_to_first_token"] = time.perf_counter() - start
+    metrics["chunks"] += 1
+
+
+def generate_response_stream(query, model=None, metrics=None, top_k=3, retriever=None, backend=None):
+    """
+    Yields the answer text chunk by chunk as Gemini produces it.
+    Pass a dict as `metrics` to receive time_to_first_token, retrieval_latency
+    and total_latency (seconds, measured from the call) once the stream ends.
+    """
+    metrics, start = _start_metrics(metrics)
+    retrieved_docs = retrieve_documents(query, top_k, retriever=retriever, backend=backend)
+    metrics["retrieval_latency"] = time.perf_counter() - start
+
+    model = model or get_client().model(GENERATION_MODEL)
+    for chunk in model.generate_content(build_prompt(query, retrieved_docs), stream=True):
+        if chunk.text:
+            _record_chunk(metrics, start)
+            yield chunk.text
+    metrics["total_latency"] = time.perf_counter() - start
+
+
+async def astream_response(query, model=None, metrics=None, top_k=3, retriever=None, backend=None):
+    """Async generator version of generate_response_stream; retrieval runs in a worker thread."""
+    metrics, start = _start_metrics(metrics)
+    retrieved_docs = await asyncio.to_thread(retrieve_documents, query, top_k, retriever, backend)
+    metrics["retrieval_latency"] = time.perf_counter() - start
+
+    model = model or get_client().model(GENERATION_MODEL)
+    response = await model.generate_content_async(build_prompt(query, retrieved_docs), stream=True)
+    async for chunk in response:
+        if chunk.text:
+            _record_chunk(metrics, start)
+            yield chunk.text
+    metrics["total_latency"] = time.perf_counter() - start
+
+
+async def generate_response_async(query, model=None, metrics=None, top_k=3, retriever=None, backend=None):
+    """Generate the full answer on the event loop, still recording time to first token."""
+    chunks = []
+    async for text in astream_response(query, model, metrics, top_k, retriever, backend):
+        chunks.append(text)
+    return "".join(chunks)
+
+
+async def generate_responses_async(queries, model=None, concurrency=32, top_k=3, retriever=None, backend=None):
+    """Answers many queries on one event loop; returns [(answer, metrics)] in query order."""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def answer(query):
+        async with semaphore:
+            metrics = {}
+            text = await generate_response_async(query, model, metrics, top_k, retriever, backend)
+            return text, metrics
+
+    return await asyncio.gather(*(answer(query) for query in queries))
+
 # Example Usage
 if __name__ == "__main__":
     # Example dataset
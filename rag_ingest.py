@@ -0,0 +1,212 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+from rag_store import RAGStore
+
+# Streaming ingestion for the RAG store.
+# Files are read lazily (text files in fixed-size blocks, JSONL line by line),
+# split into overlapping chunks, optionally de-duplicated, and upserted into a
+# RAGStore in bounded batches. Every chunk gets a stable ID "<path>#<n>", so a
+# resumed ingest that re-sends a few chunks simply overwrites them. Chunk
+# digests for de-duplication live in SQLite next to the checkpoint, so memory
+# stays flat and a resumed run still recognises chunks from earlier runs.
+
+READ_BLOCK_SIZE = 1 << 20  # Characters read from a text file at a time
+CHUNK_SIZE = 1000
+CHUNK_OVERLAP = 200
+INGEST_BATCH_SIZE = 500
+
+
+# Step 1: Read files lazily
+def iter_text_blocks(path, block_size=READ_BLOCK_SIZE):
+    """Yields a plain-text file in blocks of characters."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        while True:
+            block = f.read(block_size)
+            if not block:
+                return
+            yield block
+
+
+def iter_jsonl_texts(path, text_field="text"):
+    """Yields the text field of each JSONL record, skipping blank or malformed lines."""
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            text = record.get(text_field) if isinstance(record, dict) else None
+            if text:
+                yield text
+
+
+# Step 2: Split into overlapping chunks
+def chunk_stream(pieces, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP):
+    """
+    Splits a stream of text pieces into chunks of about `chunk_size` characters,
+    each sharing `overlap` characters with the previous one. Cuts prefer the last
+    whitespace in the final fifth of the window so words are not split.
+    """
+    if not 0 <= overlap < chunk_size // 2:
+        raise ValueError("overlap must be smaller than half of chunk_size.")
+    buffer = ""
+    start = 0  # Start of the next chunk within `buffer`
+    emitted_until = 0  # End of the last emitted chunk within `buffer`
+    for piece in pieces:
+        # Drop consumed text once per piece rather than once per chunk.
+        buffer = buffer[start:] + piece
+        emitted_until = max(emitted_until - start, 0)
+        start = 0
+        while len(buffer) - start > chunk_size:
+            window_end = start + chunk_size
+            cut = buffer.rfind(" ", start + int(chunk_size * 0.8), window_end)
+            if cut <= start:
+                cut = window_end
+            chunk = buffer[start:cut].strip()
+            if chunk:
+                yield chunk
+            emitted_until = cut
+            start = cut - overlap
+    tail = buffer[start:].strip()
+    if len(buffer) > emitted_until and tail:
+        yield tail
+
+
+def iter_file_chunks(path, chunk_size=CHUNK_SIZE, overlap=CHUNK_OVERLAP, text_field="text"):
+    """Yields the chunks of one file; each JSONL record is chunked on its own."""
+    if path.endswith(".jsonl"):
+        for text in iter_jsonl_texts(path, text_field):
+            yield from chunk_stream([text], chunk_size, overlap)
+    else:
+        yield from chunk_stream(iter_text_blocks(path), chunk_size, overlap)
+
+
+# Step 3: Checkpointing
+class IngestCheckpoint:
+    """Records how many chunks of each file have been committed to the store."""
+    def __init__(self, path):
+        self.path = path
+        self.files = {}
+        if path and os.path.exists(path):
+            with open(path, "r") as f:
+                self.files = json.load(f).get("files", {})
+
+    def committed(self, source):
+        return self.files.get(source, {}).get("chunks", 0)
+
+    def is_done(self, source):
+        return self.files.get(source, {}).get("done", False)
+
+    def update(self, source, chunks, done=False):
+        self.files[source] = {"chunks": chunks, "done": done}
+        if not self.path:
+            return
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"files": self.files}, f)
+        os.replace(tmp_path, self.path)
+
+
+class ChunkDigests:
+    """On-disk map from chunk text digest to the ID of the first chunk with that text."""
+    def __init__(self, path=None):
+        self.conn = sqlite3.connect(path or "")  # "" is a private temporary database that spills to disk
+        self.conn.execute("CREATE TABLE IF NOT EXISTS digests (digest BLOB PRIMARY KEY, chunk_id TEXT) WITHOUT ROWID")
+
+    def is_duplicate(self, chunk_id, chunk):
+        """Records the chunk; True if a different chunk had the same text. Re-sent chunks match themselves."""
+        digest = hashlib.blake2b(chunk.encode("utf-8"), digest_size=16).digest()
+        row = self.conn.execute("SELECT chunk_id FROM digests WHERE digest=?", (digest,)).fetchone()
+        if row is None:
+            self.conn.execute("INSERT INTO digests (digest, chunk_id) VALUES (?, ?)", (digest, chunk_id))
+            return False
+        return row[0] != chunk_id
+
+    def clear(self):
+        with self.conn:
+            self.conn.execute("DELETE FROM digests")
+
+    def commit(self):
+        self.conn.commit()
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+# Step 4: Embed and add in bounded batches
+def ingest_files(paths, store=None, checkpoint_path="ingest_checkpoint.json", chunk_size=CHUNK_SIZE,
+                 overlap=CHUNK_OVERLAP, batch_size=INGEST_BATCH_SIZE, dedupe=True, text_field="text"):
+    """
+    Streams files into a RAGStore. At most `batch_size` chunks are held in memory
+    at once, and the checkpoint is advanced after each committed batch, so a
+    crashed run restarted with the same arguments resumes where it stopped.
+    Returns counts of chunks seen, skipped as duplicates, and upserted.
+    """
+    store = RAGStore() if store is None else store
+    checkpoint = IngestCheckpoint(checkpoint_path)
+    digests = ChunkDigests(f"{checkpoint_path}.digests" if checkpoint_path else None) if dedupe else None
+    if digests is not None and not checkpoint.files:
+        digests.clear()  # Fresh ingest: forget digests left by a run whose checkpoint was removed
+    stats = {"chunks": 0, "duplicates": 0, "upserted": 0}
+
+    def commit(batch):
+        if digests is not None:
+            digests.commit()  # Before the upsert; a re-sent chunk matches its own digest on resume
+        if batch:
+            stats["upserted"] += store.upsert(batch)
+
+    try:
+        for path in paths:
+            source = os.path.abspath(path)
+            if checkpoint.is_done(source):
+                continue
+            resume_from = checkpoint.committed(source)
+            batch = []
+            position = 0
+
+            for position, chunk in enumerate(iter_file_chunks(path, chunk_size, overlap, text_field), start=1):
+                if position <= resume_from:
+                    continue  # Already committed by an earlier run, digests included
+                stats["chunks"] += 1
+                chunk_id = f"{source}#{position}"
+                if digests is not None and digests.is_duplicate(chunk_id, chunk):
+                    stats["duplicates"] += 1
+                    continue
+                batch.append((chunk_id, chunk))
+                if len(batch) >= batch_size:
+                    commit(batch)
+                    checkpoint.update(source, position)
+                    batch = []
+
+            commit(batch)
+            checkpoint.update(source, max(position, resume_from), done=True)
+    finally:
+        if digests is not None:
+            digests.close()
+
+    store.checkpoint()
+    return stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Stream text and JSONL files into the RAG store")
+    parser.add_argument("paths", nargs="+", help="Text or .jsonl files to ingest")
+    parser.add_argument("--store", default="rag_store", help="RAG store directory")
+    parser.add_argument("--checkpoint", default="ingest_checkpoint.json")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+    parser.add_argument("--overlap", type=int, default=CHUNK_OVERLAP)
+    parser.add_argument("--batch-size", type=int, default=INGEST_BATCH_SIZE)
+    parser.add_argument("--no-dedupe", action="store_true")
+    parser.add_argument("--text-field", default="text", help="JSONL field holding the document text")
+    args = parser.parse_args()
+
+    stats = ingest_files(args.paths, RAGStore(args.store), args.checkpoint, args.chunk_size,
+                         args.overlap, args.batch_size, not args.no_dedupe, args.text_field)
+    print(f"Ingested {stats['upserted']} chunks ({stats['duplicates']} duplicates skipped).")
@@ -0,0 +1,315 @@
+import json
+import os
+import threading
+import faiss
+import numpy as np
+import rag
+
+# Incrementally updatable RAG store.
+#
+# Documents have stable string IDs. Each stored version of a document gets a
+# monotonically increasing int64 vector ID, so adds, upserts and deletes only
+# touch the affected vectors and records. On disk the store is a directory of:
+#   index.<n>.faiss - FAISS snapshot (IndexIDMap2 over IndexFlatL2) holding the vector ids below n
+#   vectors.log     - vectors added since the snapshot: [int64 vector id][float32 * dim] records
+#   chunks.log      - JSONL journal of {"op": "put"|"del", ...} records; texts are read back by offset
+#   manifest.json   - dimension, next vector id, and the current snapshot file with its n
+# A checkpoint writes a new snapshot file and then switches the manifest to it,
+# so the snapshot and its n always change together.
+# Deleted and replaced vectors are tombstoned and filtered out of search
+# results until compaction removes them from the index and the journal.
+
+
+class RAGStore:
+    def __init__(self, directory="rag_store", backend=None, compact_ratio=0.2):
+        self.directory = directory
+        self.backend = backend
+        self.compact_ratio = compact_ratio  # Compact once this fraction of indexed vectors is dead
+        self._lock = threading.RLock()
+        self.docs = {}  # doc_id -> (vector id, offset of its put record in chunks.log)
+        self.vid_to_doc = {}  # live vector id -> doc_id
+        self.tombstones = set()  # vector ids still in the index but no longer live
+        self.index = None
+        self.dim = None
+        self.next_vid = 0
+        os.makedirs(directory, exist_ok=True)
+        self._load()
+        self.chunks_file = open(self._path("chunks.log"), "a+b")
+        self.vectors_file = open(self._path("vectors.log"), "ab")
+
+    def _path(self, name):
+        return os.path.join(self.directory, name)
+
+    # -------------------------------
+    # Loading and replay
+    # -------------------------------
+    def _load(self):
+        manifest = self._read_manifest()
+        self.dim = manifest.get("dim")
+        self.next_vid = manifest.get("next_vid", 0)
+        snapshot_next_vid = manifest.get("snapshot_next_vid", 0)
+        snapshot = manifest.get("snapshot", "index.faiss")  # Stores from before versioned snapshots
+
+        if os.path.exists(self._path(snapshot)):
+            self.index = faiss.read_index(self._path(snapshot))
+        elif self.dim:
+            self.index = self._new_index(self.dim)
+
+        self._replay_vectors(snapshot_next_vid)
+        self._replay_chunks()
+
+    def _new_index(self, dim):
+        return faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+
+    def _replay_vectors(self, snapshot_next_vid):
+        path = self._path("vectors.log")
+        if not os.path.exists(path) or not self.dim:
+            return
+        record_size = 8 + self.dim * 4
+        with open(path, "rb") as f:
+            data = f.read()
+        complete = len(data) // record_size
+        if complete * record_size != len(data):
+            # Drop a partially written trailing record left by a crash.
+            with open(path, "r+b") as f:
+                f.truncate(complete * record_size)
+        records = np.frombuffer(data[:complete * record_size], dtype=np.uint8).reshape(complete, record_size)
+        if not complete:
+            return
+        vids = records[:, :8].copy().view(np.int64).ravel()
+        vectors = records[:, 8:].copy().view(np.float32)
+        # Vectors below snapshot_next_vid were already folded into the snapshot.
+        fresh = vids >= snapshot_next_vid
+        if fresh.any():
+            self.index.add_with_ids(vectors[fresh], vids[fresh])
+        self.next_vid = max(self.next_vid, int(vids.max()) + 1)
+
+    def _replay_chunks(self):
+        path = self._path("chunks.log")
+        if not os.path.exists(path):
+            return
+        good_bytes = 0
+        with open(path, "rb") as f:
+            offset = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # Partially written trailing record
+                record = json.loads(line)
+                if record["op"] == "put":
+                    self._apply_put(record["doc_id"], record["vid"], offset)
+                else:
+                    self._apply_delete(record["doc_id"])
+                offset += len(line)
+                good_bytes = offset
+        if good_bytes != os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(good_bytes)
+
+        # Vectors whose put record never made it to the journal are dead too.
+        if self.index is not None:
+            all_vids = faiss.vector_to_array(self.index.id_map)
+            self.tombstones.update(int(v) for v in all_vids if int(v) not in self.vid_to_doc)
+
+    def _apply_put(self, doc_id, vid, offset):
+        old = self.docs.get(doc_id)
+        if old is not None:
+            self.tombstones.add(old[0])
+            self.vid_to_doc.pop(old[0], None)
+        self.docs[doc_id] = (vid, offset)
+        self.vid_to_doc[vid] = doc_id
+
+    def _apply_delete(self, doc_id):
+        old = self.docs.pop(doc_id, None)
+        if old is not None:
+            self.tombstones.add(old[0])
+            self.vid_to_doc.pop(old[0], None)
+
+    # -------------------------------
+    # Writes
+    # -------------------------------
+    def _append_chunk_record(self, record):
+        self.chunks_file.seek(0, os.SEEK_END)
+        offset = self.chunks_file.tell()
+        self.chunks_file.write((json.dumps(record) + "\n").encode("utf-8"))
+        return offset
+
+    def _read_manifest(self):
+        if not os.path.exists(self._path("manifest.json")):
+            return {}
+        with open(self._path("manifest.json"), "r") as f:
+            return json.load(f)
+
+    def _write_manifest(self, **snapshot):
+        """Atomically rewrites the manifest; the snapshot fields are kept unless given."""
+        manifest = {"snapshot_next_vid": 0, **self._read_manifest(), **snapshot}
+        manifest.update(dim=self.dim, next_vid=self.next_vid)
+        tmp_path = self._path("manifest.json.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_path, self._path("manifest.json"))
+
+    def _normalize(self, documents):
+        if isinstance(documents, dict):
+            documents = documents.items()
+        return [(str(doc_id), text) for doc_id, text in documents]
+
+    def upsert(self, documents):
+        """Adds or replaces documents given as a {doc_id: text} dict or (doc_id, text) pairs."""
+        documents = self._normalize(documents)
+        if not documents:
+            return 0
+        texts = (text for _, text in documents)
+        position = 0
+        with self._lock:
+            for batch, embeddings in rag.embed_in_batches(texts, self.backend):
+                embeddings = np.ascontiguousarray(embeddings, dtype="float32")
+                if self.index is None:
+                    self.dim = embeddings.shape[1]
+                    self.index = self._new_index(self.dim)
+                    self._write_manifest()
+                vids = np.arange(self.next_vid, self.next_vid + len(batch), dtype=np.int64)
+                self.next_vid += len(batch)
+
+                # Vectors first, then journal records: a crash in between leaves
+                # unreferenced vectors, which replay treats as tombstones.
+                records = np.empty((len(batch), 8 + self.dim * 4), dtype=np.uint8)
+                records[:, :8] = vids.reshape(-1, 1).view(np.uint8)
+                records[:, 8:] = embeddings.view(np.uint8)
+                self.vectors_file.write(records.tobytes())
+                self.vectors_file.flush()
+                self.index.add_with_ids(embeddings, vids)
+
+                for vid, text in zip(vids, batch):
+                    doc_id = documents[position][0]
+                    position += 1
+                    offset = self._append_chunk_record({"op": "put", "doc_id": doc_id, "vid": int(vid), "text": text})
+                    self._apply_put(doc_id, int(vid), offset)
+            self.chunks_file.flush()
+            self._write_manifest()
+            self._maybe_compact()
+        return len(documents)
+
+    def add(self, documents):
+        """Adds new documents; raises KeyError if any ID is already stored."""
+        documents = self._normalize(documents)
+        with self._lock:
+            existing = [doc_id for doc_id, _ in documents if doc_id in self.docs]
+            if existing:
+                raise KeyError(f"Documents already exist: {existing[:5]}")
+            return self.upsert(documents)
+
+    def delete(self, doc_ids):
+        """Tombstones documents by ID; unknown IDs are ignored. Returns the number deleted."""
+        deleted = 0
+        with self._lock:
+            for doc_id in doc_ids:
+                doc_id = str(doc_id)
+                if doc_id not in self.docs:
+                    continue
+                self._append_chunk_record({"op": "del", "doc_id": doc_id})
+                self._apply_delete(doc_id)
+                deleted += 1
+            self.chunks_file.flush()
+            self._maybe_compact()
+        return deleted
+
+    # -------------------------------
+    # Reads
+    # -------------------------------
+    def __len__(self):
+        return len(self.docs)
+
+    def __contains__(self, doc_id):
+        return str(doc_id) in self.docs
+
+    def _read_record(self, offset):
+        self.chunks_file.seek(offset)
+        return json.loads(self.chunks_file.readline())
+
+    def get(self, doc_id):
+        """Returns the current text of a document, or None."""
+        with self._lock:
+            entry = self.docs.get(str(doc_id))
+            return self._read_record(entry[1])["text"] if entry else None
+
+    def search(self, query_embeddings, top_k=3):
+        """Returns, per query row, a list of (doc_id, distance, text) for live documents."""
+        query_embeddings = np.asarray(query_embeddings, dtype="float32")
+        with self._lock:
+            if self.index is None or not self.docs:
+                return [[] for _ in range(len(query_embeddings))]
+            params = None
+            if self.tombstones:
+                # Let FAISS skip tombstoned vectors, so every returned hit is live.
+                dead = faiss.IDSelectorBatch(np.array(sorted(self.tombstones), dtype=np.int64))
+                params = faiss.SearchParameters(sel=faiss.IDSelectorNot(dead))
+            k = min(top_k, len(self.docs))
+            distances, vids = self.index.search(query_embeddings, k, params=params)
+            results = []
+            for row_distances, row_vids in zip(distances, vids):
+                hits = []
+                for distance, vid in zip(row_distances, row_vids):
+                    doc_id = self.vid_to_doc.get(int(vid))
+                    if doc_id is None:
+                        continue
+                    hits.append((doc_id, float(distance), self._read_record(self.docs[doc_id][1])["text"]))
+                    if len(hits) == top_k:
+                        break
+                results.append(hits)
+            return results
+
+    def retrieve(self, query, top_k=3):
+        """Embeds a query with the store's backend and returns the texts of the top-k live documents."""
+        _, query_embedding = next(rag.embed_in_batches([query], self.backend, max_workers=1))
+        return [text for _, _, text in self.search(query_embedding, top_k)[0]]
+
+    # -------------------------------
+    # Maintenance
+    # -------------------------------
+    def _maybe_compact(self):
+        if self.index is not None and self.index.ntotal and \
+                len(self.tombstones) / self.index.ntotal > self.compact_ratio:
+            self.compact()
+
+    def checkpoint(self):
+        """Folds vectors.log into the FAISS snapshot and empties the log."""
+        with self._lock:
+            if self.index is None:
+                return
+            old_snapshot = self._read_manifest().get("snapshot", "index.faiss")
+            snapshot = f"index.{self.next_vid}.faiss"
+            tmp_path = self._path(snapshot + ".tmp")
+            faiss.write_index(self.index, tmp_path)
+            os.replace(tmp_path, self._path(snapshot))
+            # The manifest switch is the commit point: before it, replay uses the old snapshot and log.
+            self._write_manifest(snapshot=snapshot, snapshot_next_vid=self.next_vid)
+            if old_snapshot != snapshot and os.path.exists(self._path(old_snapshot)):
+                os.remove(self._path(old_snapshot))
+            self.vectors_file.close()
+            self.vectors_file = open(self._path("vectors.log"), "wb")
+
+    def compact(self):
+        """Removes tombstoned vectors from the index and rewrites the journal with live records only."""
+        with self._lock:
+            if self.tombstones:
+                self.index.remove_ids(np.array(sorted(self.tombstones), dtype=np.int64))
+                self.tombstones.clear()
+
+            tmp_path = self._path("chunks.log.tmp")
+            new_docs = {}
+            with open(tmp_path, "wb") as out:
+                for doc_id, (vid, offset) in self.docs.items():
+                    line = (json.dumps(self._read_record(offset)) + "\n").encode("utf-8")
+                    new_docs[doc_id] = (vid, out.tell())
+                    out.write(line)
+            # Snapshot first so the rewritten journal never references vectors missing from disk.
+            self.checkpoint()
+            self.chunks_file.close()
+            os.replace(tmp_path, self._path("chunks.log"))
+            self.chunks_file = open(self._path("chunks.log"), "a+b")
+            self.docs = new_docs
+
+    def close(self):
+        with self._lock:
+            self.chunks_file.close()
+            self.vectors_file.close()
@@ -0,0 +1,49 @@
+import hashlib
+import re
+import numpy as np
+
+# Local, deterministic text vectors (no API calls).
+# Words and character trigrams are hashed into a fixed number of buckets, so
+# texts that share vocabulary end up close to each other under cosine similarity.
+
+TOKEN_PATTERN = re.compile(r"\w+")
+
+
+def _bucket(feature, dim):
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    sign = 1.0 if value & 1 else -1.0
+    return (value >> 1) % dim, sign
+
+
+def hash_embedding(text, dim=768):
+    """Embeds a single text into a unit-length float32 vector."""
+    vector = np.zeros(dim, dtype="float32")
+    words = TOKEN_PATTERN.findall(text.lower())
+    for word in words:
+        bucket, sign = _bucket("w:" + word, dim)
+        vector[bucket] += sign
+        padded = f" {word} "
+        for i in range(len(padded) - 2):
+            bucket, sign = _bucket("c:" + padded[i:i + 3], dim)
+            vector[bucket] += 0.5 * sign
+
+    norm = np.linalg.norm(vector)
+    if norm > 0:
+        vector /= norm
+    return vector
+
+
+def hash_embeddings(texts, dim=768):
+    """Embeds a list of texts into an (n, dim) float32 matrix."""
+    matrix = np.zeros((len(texts), dim), dtype="float32")
+    for i, text in enumerate(texts):
+        matrix[i] = hash_embedding(text, dim)
+    return matrix
+
+
+def cosine_scores(query_vector, matrix):
+    """Cosine similarity between one unit vector and the rows of a unit-normalized matrix."""
+    if len(matrix) == 0:
+        return np.zeros(0, dtype="float32")
+    return matrix @ query_vector